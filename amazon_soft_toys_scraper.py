@@ -2,16 +2,29 @@ from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException, StaleElementReferenceException
 from bs4 import BeautifulSoup
-import pandas as pd
 import time
 import re
+import os
+import json
+import threading
+import urllib.error
+import urllib.request
+import pandas as pd
+from urllib.parse import quote_plus, urlparse
+from utils.sponsored import is_sponsored
+from utils.records import ProductRecord, ProductBatch, parse_price, parse_rating, parse_count
+from utils.crawl import (CrawlFrontier, HostRateLimiter, classify_page_state,
+                         PAGE_RESULTS, PAGE_CAPTCHA, PAGE_EMPTY, PAGE_ERROR)
+from utils.page_archive import PageArchive
 
-def set_up_driver():
-    """Set up and configure the Chrome WebDriver"""
+BASE_URL = "https://www.amazon.in"
+DAEMON_URL = "http://127.0.0.1:8060"  # browser_daemon.py control endpoint
+
+def build_chrome_options(profile_dir=None):
+    """Chrome options shared by cold starts and the warm browser daemon"""
     options = Options()
     options.add_argument("--start-maximized")
     options.add_argument("--disable-notifications")
@@ -25,31 +38,144 @@ def set_up_driver():
     # Add debugging options
     options.add_argument("--disable-blink-features=AutomationControlled")  # Hide automation
     
+    # Persistent profile keeps the HTTP cache and cookies between sessions
+    if profile_dir:
+        options.add_argument(f"--user-data-dir={os.path.abspath(profile_dir)}")
+    return options
+
+def set_up_driver():
+    """Set up and configure the Chrome WebDriver"""
     print("Setting up Chrome WebDriver with optimized options...")
-    driver = webdriver.Chrome(options=options)
+    driver = webdriver.Chrome(options=build_chrome_options())
     
     # Add a small delay to ensure the browser is fully initialized
     time.sleep(1)
     
     return driver
 
-def search_amazon(driver, search_term):
-    """Navigate to Amazon and search for the specified term"""
-    print(f"Navigating to Amazon India and searching for '{search_term}'...")
-    driver.get("https://www.amazon.in/")
+def attach_driver(executor_url, session_id):
+    """Attach to an existing remote WebDriver session instead of starting a new browser"""
+    class AttachedRemote(webdriver.Remote):
+        def start_session(self, capabilities):
+            self.session_id = session_id
+            self.caps = {}
+    return AttachedRemote(command_executor=executor_url, options=Options())
+
+def daemon_request(daemon_url, path, payload=None, timeout=10):
+    """POST a JSON request to the browser daemon and return its JSON reply"""
+    data = json.dumps(payload or {}).encode('utf-8')
+    request = urllib.request.Request(f"{daemon_url}{path}", data=data, headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
+
+def connect_driver(daemon_url=DAEMON_URL):
+    """Borrow a warm session from browser_daemon.py when it is running, otherwise cold-start Chrome"""
+    start = time.perf_counter()
+    try:
+        lease = daemon_request(daemon_url, "/acquire")
+    except OSError as e:
+        print(f"Browser daemon not available ({e}), cold-starting Chrome...")
+        driver = set_up_driver()
+        print(f"Cold start took {time.perf_counter() - start:.2f}s")
+        return driver
+    driver = attach_driver(lease['executor_url'], lease['session_id'])
+    driver.daemon_url = daemon_url
+    driver.daemon_slot = lease['slot']
+    driver.daemon_lease = lease['lease_id']
+    driver.attach_seconds = time.perf_counter() - start
+    driver.lease_released = threading.Event()
+    threading.Thread(target=keep_lease, args=(driver, lease['lease_timeout'] / 3), daemon=True).start()
+    print(f"Attached to warm browser session (slot {lease['slot']}) in {driver.attach_seconds:.2f}s "
+          f"(its cold start took {lease['cold_start_seconds']:.2f}s)")
+    return driver
+
+def keep_lease(driver, interval):
+    """Renew the daemon lease while this run uses the session, so a long run is not reclaimed as abandoned"""
+    while not driver.lease_released.wait(interval):
+        try:
+            daemon_request(driver.daemon_url, "/renew", {'slot': driver.daemon_slot, 'lease_id': driver.daemon_lease})
+        except urllib.error.HTTPError as e:
+            if e.code == 409:
+                print(f"⚠️ The browser daemon reclaimed slot {driver.daemon_slot}; its session is no longer ours")
+                return
+            print(f"Could not renew the browser session lease: {e}")
+        except OSError as e:
+            print(f"Could not renew the browser session lease: {e}")
+
+def release_driver(driver):
+    """Hand a daemon session back (reporting pages loaded and attach time), or quit a cold-started browser"""
+    if getattr(driver, 'daemon_slot', None) is None:
+        driver.quit()
+        return
+    driver.lease_released.set()
+    try:
+        daemon_request(driver.daemon_url, "/release", {
+            'slot': driver.daemon_slot,
+            'lease_id': driver.daemon_lease,
+            'pages': getattr(driver, 'pages_loaded', 0),
+            'attach_seconds': driver.attach_seconds,
+        })
+    except urllib.error.HTTPError as e:
+        if e.code == 409:
+            # The lease was reclaimed (and the session recycled) while we held it; nothing left to hand back
+            print(f"Browser session on slot {driver.daemon_slot} was already reclaimed by the daemon")
+        else:
+            print(f"Could not release browser session to the daemon: {e}")
+    except OSError as e:
+        print(f"Could not release browser session to the daemon: {e}")
+
+def search_url(search_term, page=1):
+    """Build the results URL for a search term and page number"""
+    url = f"{BASE_URL}/s?k={quote_plus(search_term)}"
+    return url if page == 1 else f"{url}&page={page}"
+
+def page_finished_loading(driver):
+    """True once the browser reports the document fully loaded"""
+    try:
+        return driver.execute_script("return document.readyState") == "complete"
+    except Exception:
+        return False
+
+def wait_for_page_state(driver, timeout=15, poll=0.5):
+    """Poll the page until it looks like results, a captcha or an empty search, then return that state.
+    A fully loaded page that is none of those (a 503 or "dogs of Amazon" page) is an error straight away"""
+    deadline = time.time() + timeout
+    state = classify_page_state(driver.page_source)
+    while state == PAGE_ERROR and time.time() < deadline:
+        if page_finished_loading(driver):
+            # Classify once more, in case the page completed between the two checks
+            return classify_page_state(driver.page_source)
+        time.sleep(poll)
+        state = classify_page_state(driver.page_source)
+    return state
+
+def search_amazon(driver, search_term, page=1):
+    """Open the results page for the search term and return its page state (results/captcha/empty/error)"""
+    print(f"Navigating to Amazon India and searching for '{search_term}' (page {page})...")
+    driver.pages_loaded = getattr(driver, 'pages_loaded', 0) + 1
+    if page > 1:
+        driver.get(search_url(search_term, page))
+        return wait_for_page_state(driver)
+    
+    driver.get(f"{BASE_URL}/")
     
-    # Wait for and interact with the search box
-    wait = WebDriverWait(driver, 30)
+    # Wait for the search box, but stop as soon as a robot check shows up instead
+    wait = WebDriverWait(driver, 15)
     try:
-        search_box = wait.until(EC.element_to_be_clickable((By.ID, "twotabsearchtextbox")))
+        wait.until(lambda d: d.find_elements(By.ID, "twotabsearchtextbox")
+                   or classify_page_state(d.page_source) == PAGE_CAPTCHA)
+        search_boxes = driver.find_elements(By.ID, "twotabsearchtextbox")
+        if not search_boxes:
+            print("Robot check detected on the home page.")
+            return PAGE_CAPTCHA
+        search_box = search_boxes[0]
         search_box.clear()
         search_box.send_keys(search_term)
         search_box.send_keys(Keys.RETURN)
-        time.sleep(3)  # Short pause after search submission
-    except TimeoutException:
+    except (TimeoutException, StaleElementReferenceException):
         print("Timeout waiting for search box. Trying alternative approach...")
-        driver.get(f"https://www.amazon.in/s?k={search_term.replace(' ', '+')}")
-        time.sleep(3)
+        driver.get(search_url(search_term))
+    return wait_for_page_state(driver)
 
 def scroll_page(driver, scroll_pauses=8, scroll_amount=1000):
     """Scroll the page to load more products with improved reliability"""
@@ -83,38 +209,11 @@ def scroll_page(driver, scroll_pauses=8, scroll_amount=1000):
     driver.execute_script("window.scrollTo(0, 0);")
     time.sleep(2)
 
-def is_sponsored(product):
-    """Improved detection of sponsored products on Amazon India"""
-    try:
-        # Check for explicit 'Sponsored' badge via text
-        badge = product.select_one("span.a-color-secondary, span.a-text-bold")
-        if badge and badge.text.strip().lower() == "sponsored":
-            return True
-
-        # Look for 'Sponsored' inside nested spans/divs
-        for tag in product.find_all(['span', 'div']):
-            if tag.text.strip().lower() == "sponsored":
-                return True
-
-        # Sponsored label via ARIA label or data attribute (used in mobile view and newer Amazon layouts)
-        if 'data-component-type' in product.attrs and product['data-component-type'] == 's-sponsored-result':
-            return True
-
-        # Search inside specific divs used for sponsored labeling
-        possible_labels = product.select("div.s-sponsored-label-info-icon, span.sponsored-label-text, span.puis-sponsored-label")
-        for label in possible_labels:
-            if "sponsored" in label.text.strip().lower():
-                return True
-    except Exception:
-        pass
-    return False
-
-
 def extract_product_info(product):
-    """Extract all required information from a product element with improved robustness"""
+    """Extract a ProductRecord from a product element, parsing numbers here so missing values stay None"""
     try:
         # Title extraction - try multiple possible selectors
-        title = "N/A"
+        title = None
         title_selectors = [
             ('span', {'class': 'a-size-medium a-color-base a-text-normal'}),
             ('span', {'class': 'a-size-base-plus a-color-base a-text-normal'}),
@@ -128,7 +227,7 @@ def extract_product_info(product):
                 break
         
         # Brand extraction
-        brand = "Unknown"
+        brand = None
         brand_element = product.find('span', {'class': 'a-size-base-plus a-color-base'})
         if brand_element and brand_element.text.strip():
             brand = brand_element.text.strip()
@@ -140,60 +239,53 @@ def extract_product_info(product):
                 brand_match = re.search(r'\/stores\/node\/\d+\/(\w+)', href)
                 if brand_match:
                     brand = brand_match.group(1).replace('-', ' ').title()
-                elif title != "N/A":
+                elif title:
                     # Use first word of title as fallback for brand
                     brand = title.split()[0]
         
         # Rating extraction
-        rating = "N/A"
+        rating = None
         rating_elem = product.find('span', {'class': 'a-icon-alt'})
         if rating_elem and rating_elem.text:
-            rating_text = rating_elem.text.strip()
-            rating_match = re.search(r'([\d\.]+)', rating_text)
-            if rating_match:
-                rating = rating_match.group(1)
+            rating = parse_rating(rating_elem.text.strip())
             
         # Reviews count extraction
-        reviews = "0"
+        reviews = None
         reviews_elem = product.find('span', {'class': 'a-size-base', 'dir': 'auto'})
         if reviews_elem and reviews_elem.text.strip():
-            reviews_text = reviews_elem.text.strip()
-            # Extract only digits from the reviews text
-            reviews_digits = re.sub(r'[^\d]', '', reviews_text)
-            if reviews_digits:
-                reviews = reviews_digits
+            reviews = parse_count(reviews_elem.text.strip())
         
         # Price extraction
-        price = "N/A"
+        price = None
         price_whole_elem = product.find('span', {'class': 'a-price-whole'})
         if price_whole_elem and price_whole_elem.text.strip():
-            price = price_whole_elem.text.strip().replace(',', '').rstrip('.')
+            price = parse_price(price_whole_elem.text.strip())
         
         # Image URL extraction
-        image_url = "N/A"
+        image_url = None
         image_elem = product.find('img', {'class': 's-image'})
         if image_elem and 'src' in image_elem.attrs:
             image_url = image_elem['src']
         
         # Product URL extraction
-        product_url = "N/A"
+        product_url = None
         link_elem = product.find('a', {'class': 'a-link-normal'})
         if link_elem and 'href' in link_elem.attrs:
             href = link_elem['href']
             if href.startswith('/'):
-                product_url = f"https://www.amazon.in{href}"
+                product_url = f"{BASE_URL}{href}"
             else:
                 product_url = href
         
-        return {
-            'Title': title,
-            'Brand': brand,
-            'Rating': rating,
-            'Reviews': reviews,
-            'Price': price,
-            'Image URL': image_url,
-            'Product URL': product_url
-        }
+        return ProductRecord(
+            title=title,
+            brand=brand,
+            rating=rating,
+            reviews=reviews,
+            price=price,
+            image_url=image_url,
+            product_url=product_url
+        )
     
     except Exception as e:
         print(f"Error extracting product info: {e}")
@@ -225,9 +317,9 @@ def extract_sponsored_products(soup):
             product_info = extract_product_info(product)
             if product_info:
                 # Add a sponsored marker to the data
-                product_info['Is Sponsored'] = 'Yes'
+                product_info.is_sponsored = True
                 sponsored_data.append(product_info)
-                print(f"✓ Added sponsored product: {product_info['Title'][:40]}...")
+                print(f"✓ Added sponsored product: {(product_info.title or 'N/A')[:40]}...")
             else:
                 continue  # Skip non-sponsored products completely
         else:
@@ -243,83 +335,174 @@ def extract_sponsored_products(soup):
     
     return sponsored_data
 
-def main():
-    """Main function to run the scraper"""
-    driver = set_up_driver()
-    search_term = "soft toys"
-    all_sponsored_data = []
+def debug_sponsored_patterns(driver):
+    """Print which sponsored markers appear in the first part of the page source"""
+    print("\n🔍 DEBUG: Looking for sponsored elements in page source...")
+    page_source_sample = driver.page_source[:10000]  # Look at first 10K chars
+    common_sponsor_patterns = [
+        "Sponsored", "sponsored-label", "s-sponsored-label", 
+        "puis-sponsored-label", "data-component-type=\"s-sponsored"
+    ]
     
+    for pattern in common_sponsor_patterns:
+        if pattern in page_source_sample:
+            print(f"✓ Found pattern '{pattern}' in page source!")
+        else:
+            print(f"✗ Pattern '{pattern}' NOT found in page source.")
+    
+    # Take a screenshot before scrolling (optional but helpful)
     try:
-        # Search and navigate to results page
-        search_amazon(driver, search_term)
-        
-        # Add a debug function to help identify sponsored elements
-        print("\n🔍 DEBUG: Looking for sponsored elements in page source...")
-        page_source_sample = driver.page_source[:10000]  # Look at first 10K chars
-        common_sponsor_patterns = [
-            "Sponsored", "sponsored-label", "s-sponsored-label", 
-            "puis-sponsored-label", "data-component-type=\"s-sponsored"
-        ]
-        
-        for pattern in common_sponsor_patterns:
-            if pattern in page_source_sample:
-                print(f"✓ Found pattern '{pattern}' in page source!")
-            else:
-                print(f"✗ Pattern '{pattern}' NOT found in page source.")
-        
-        # Take a screenshot before scrolling (optional but helpful)
-        try:
-            screenshot_file = "amazon_before_scroll.png"
-            driver.save_screenshot(screenshot_file)
-            print(f"Saved screenshot to {screenshot_file}")
-        except:
-            print("Could not save screenshot")
-        
-        # Scroll to load more products
+        screenshot_file = "amazon_before_scroll.png"
+        driver.save_screenshot(screenshot_file)
+        print(f"Saved screenshot to {screenshot_file}")
+    except:
+        print("Could not save screenshot")
+
+def archive_page(archive, keyword, page, html, state):
+    """Append a fetched page source to the raw-page archive (if one is open); archive problems never stop the crawl"""
+    if archive is None:
+        return
+    try:
+        archive.add_page(keyword, page, html, state, url=search_url(keyword, page))
+    except Exception as e:
+        print(f"Could not archive '{keyword}' page {page}: {e}")
+
+def scrape_results_page(driver, keyword, page, archive=None):
+    """Scroll a loaded results page, parse it and return (sponsored records, whether a next page exists)"""
+    # Scroll to load more products
+    if page == 1:
         scroll_page(driver, scroll_pauses=10, scroll_amount=800)
+    else:
+        scroll_page(driver, scroll_pauses=5)
+    
+    # Parse the page
+    print("Parsing page with BeautifulSoup...")
+    page_source = driver.page_source
+    archive_page(archive, keyword, page, page_source, PAGE_RESULTS)
+    soup = BeautifulSoup(page_source, 'lxml')
+    
+    # Extract sponsored products
+    sponsored_data = extract_sponsored_products(soup)
+    for product_info in sponsored_data:
+        product_info.keyword = keyword
+    has_next_page = soup.select_one('.s-pagination-next:not(.s-pagination-disabled)') is not None
+    return sponsored_data, has_next_page
+
+class CsvSink:
+    """What main() hands to crawl() as all_sponsored_data: every finished page is appended to the CSV
+    straight away, so the rows of a page are on disk before the frontier marks the page done."""
+
+    def __init__(self, filename, append=False):
+        self.filename = filename
+        self.append = append
+        self.records = 0
+
+    def __len__(self):
+        return self.records
+
+    def extend(self, records):
+        batch = ProductBatch()
+        batch.extend(records)
+        if not batch:
+            return
+        df = batch.to_dataframe()
+        # A fresh crawl replaces the previous CSV with its first page, a resumed one adds to it
+        if self.append and os.path.exists(self.filename):
+            df.to_csv(self.filename, mode='a', header=False, index=False)
+        else:
+            df.to_csv(self.filename, index=False)
+            self.append = True
+        self.records += len(df)
+
+def crawl(driver, frontier, all_sponsored_data, max_pages=2, archive=None):
+    """Work through the crawl frontier, rate limited per host, appending sponsored products as pages finish
+    (all_sponsored_data only needs an extend() method, e.g. a CsvSink or the streaming pipeline's queue sink).
+    A page is marked complete only after extend() returns, so the sink must have stored its rows by then.
+    Every fetched page, blocked ones included, goes into the raw-page archive when one is given."""
+    limiter = HostRateLimiter()
+    bucket = limiter.bucket(urlparse(BASE_URL).netloc)
+    debug_done = False
+    
+    while True:
+        task = frontier.pop()
+        if task is None:
+            break
+        keyword, page = task['keyword'], task['page']
+        waited = bucket.acquire()
+        if waited:
+            print(f"Rate limiter held the request for {waited:.1f}s (rate {bucket.rate:.2f}/s)")
         
-        # Parse the page
-        print("Parsing page with BeautifulSoup...")
-        soup = BeautifulSoup(driver.page_source, 'lxml')
+        # Classify the page before parsing so blocked pages are requeued straight away
+        state = search_amazon(driver, keyword, page)
+        print(f"Page state for '{keyword}' page {page}: {state}")
+        if state != PAGE_RESULTS:
+            archive_page(archive, keyword, page, driver.page_source, state)
+        if state == PAGE_CAPTCHA:
+            bucket.record_block()
+            frontier.requeue(task, state)
+            continue
+        if state == PAGE_ERROR:
+            bucket.record_error()
+            frontier.requeue(task, state)
+            continue
+        bucket.record_success()
+        if state == PAGE_EMPTY:
+            frontier.complete(task)
+            continue
         
-        # Extract sponsored products
-        sponsored_data = extract_sponsored_products(soup)
-        all_sponsored_data.extend(sponsored_data)
+        if not debug_done:
+            debug_sponsored_patterns(driver)
+            debug_done = True
         
-        # Optional: Enable pagination if needed
-        enable_pagination = False  # Set to True to scrape multiple pages
-        if enable_pagination:
-            try:
-                for page in range(2, 3):  # Limit to first 2 pages
-                    next_button = WebDriverWait(driver, 10).until(
-                        EC.element_to_be_clickable((By.CSS_SELECTOR, '.s-pagination-next:not(.s-pagination-disabled)'))
-                    )
-                    if next_button:
-                        print(f"Navigating to page {page}...")
-                        next_button.click()
-                        time.sleep(5)
-                        scroll_page(driver, scroll_pauses=5)
-                        soup = BeautifulSoup(driver.page_source, 'lxml')
-                        page_sponsored_data = extract_sponsored_products(soup)
-                        all_sponsored_data.extend(page_sponsored_data)
-                    else:
-                        print("No more pages available")
-                        break
-            except Exception as e:
-                print(f"Error navigating to next page: {e}")
+        sponsored_data, has_next_page = scrape_results_page(driver, keyword, page, archive)
+        all_sponsored_data.extend(sponsored_data)
         
+        # Queue the next results page if there is one
+        if page < max_pages and has_next_page:
+            frontier.add(keyword, page + 1)
+        frontier.complete(task)
+    
+    if frontier.failed:
+        print(f"⚠️ {len(frontier.failed)} page(s) could not be fetched: "
+              + ", ".join(f"'{t['keyword']}' p{t['page']} ({t.get('last_error')})" for t in frontier.failed))
+
+def main(search_terms=("soft toys",), max_pages=2, frontier_file="crawl_frontier.json", archive_dir="page_archive"):
+    """Main function to run the scraper"""
+    frontier = CrawlFrontier(frontier_file)
+    resumed = frontier.has_pending()
+    if resumed:
+        print("Resuming unfinished crawl from the saved frontier...")
+    else:
+        frontier.clear()
+        for search_term in search_terms:
+            frontier.add(search_term, 1)
+    
+    # Raw page sources go to a compressed archive (archive_dir=None turns this off)
+    archive = PageArchive(archive_dir) if archive_dir else None
+    if archive:
+        print(f"Archiving page sources to '{archive_dir}' as run {archive.run}")
+    
+    driver = connect_driver()
+    # Rows are appended to the CSV page by page, so an interrupted crawl keeps what it has scraped
+    filename = f"{search_terms[0].replace(' ', '_')}_sponsored.csv"
+    all_sponsored_data = CsvSink(filename, append=resumed)
+    
+    try:
+        crawl(driver, frontier, all_sponsored_data, max_pages=max_pages, archive=archive)
+    except KeyboardInterrupt:
+        print("Interrupted; rerun to resume from the saved frontier.")
     except Exception as e:
         print(f"Error during scraping process: {e}")
     
     finally:
-        # Close the browser
-        driver.quit()
+        # Close the browser (or hand it back to the browser daemon)
+        release_driver(driver)
+        if archive:
+            archive.close()
     
-    # Save the data to CSV
+    # The rows are already in the CSV; report on the ones this run added
     if all_sponsored_data:
-        df = pd.DataFrame(all_sponsored_data)
-        filename = f"{search_term.replace(' ', '_')}_sponsored.csv"
-        df.to_csv(filename, index=False)
+        df = pd.read_csv(filename).tail(len(all_sponsored_data))
         print(f"\n✅ Scraping complete! {len(all_sponsored_data)} sponsored products saved to '{filename}'")
         print(f"Columns in CSV: {', '.join(df.columns)}")
         
@@ -330,7 +513,7 @@ def main():
             
             # Verify we only have sponsored products
             if 'Is Sponsored' in df.columns:
-                if df['Is Sponsored'].all() == 'Yes':
+                if (df['Is Sponsored'] == 'Yes').all():
                     print("\n✓ VERIFICATION: All products in the CSV are confirmed sponsored.")
                 else:
                     print("\n⚠️ WARNING: Some products may not be sponsored!")
@@ -0,0 +1,96 @@
+import argparse
+import sys
+import time
+from bs4 import BeautifulSoup
+from amazon_soft_toys_scraper import extract_sponsored_products
+from utils.crawl import PAGE_RESULTS
+from utils.page_archive import PageArchive
+from utils.records import ProductBatch
+
+def show_stats(archive):
+    stats = archive.stats()
+    print(f"{stats['frames']} frames ({stats['cards']} result cards), {stats['raw_bytes'] / 1e6:.1f} MB raw -> "
+          f"{stats['stored_bytes'] / 1e6:.1f} MB stored (ratio {stats['ratio']}), {stats['dictionaries']} dictionary(ies)")
+    for run in stats['runs']:
+        started = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(run['started']))
+        print(f"  run {run['run']}: {run['fetches']} page fetch(es), started {started}")
+
+def write_output(text, output):
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(f"Saved {len(text)} characters to {output}")
+    else:
+        sys.stdout.write(text)
+
+def reparse(archive, run=None, output="reparsed_sponsored.csv"):
+    """Re-run sponsored extraction on archived results pages (latest fetch of each run/keyword/page)."""
+    latest = {}
+    for fetch in archive.fetches(run=run, state=PAGE_RESULTS):
+        latest[(fetch['run'], fetch['keyword'], fetch['page'])] = fetch
+    records = ProductBatch()
+    for (_, keyword, page), fetch in sorted(latest.items()):
+        print(f"Re-parsing '{keyword}' page {page} (run {fetch['run']})...")
+        soup = BeautifulSoup(archive.read_fetch(fetch['id']), 'lxml')
+        sponsored_data = extract_sponsored_products(soup)
+        for product_info in sponsored_data:
+            product_info.keyword = keyword
+        records.extend(sponsored_data)
+    if not records:
+        print("No archived results pages to re-parse.")
+        return
+    records.to_dataframe().to_csv(output, index=False)
+    print(f"\n✅ {len(records)} sponsored products from {len(latest)} archived page(s) saved to '{output}'")
+
+def main():
+    """Command-line entry point: inspect the raw-page archive, read pages or cards back, re-parse pages."""
+    parser = argparse.ArgumentParser(description="Read the compressed raw-page archive written by the scraper")
+    parser.add_argument("--archive-dir", default="page_archive")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("stats", help="Runs, page counts and compression ratio")
+
+    page = commands.add_parser("page", help="Print (or save) the source of an archived results page")
+    page.add_argument("keyword")
+    page.add_argument("page", type=int)
+    page.add_argument("--run", help="Run id (default: latest fetch in any run)")
+    page.add_argument("-o", "--output")
+
+    card = commands.add_parser("card", help="Print (or save) the archived result card of one ASIN")
+    card.add_argument("asin")
+    card.add_argument("--run")
+    card.add_argument("--keyword")
+    card.add_argument("-o", "--output")
+
+    commands.add_parser("train", help="Train a new compression dictionary from recent result cards")
+
+    reparse_command = commands.add_parser("reparse", help="Re-run sponsored extraction on archived pages into a CSV")
+    reparse_command.add_argument("--run")
+    reparse_command.add_argument("-o", "--output", default="reparsed_sponsored.csv")
+
+    args = parser.parse_args()
+    archive = PageArchive(args.archive_dir)
+    try:
+        if args.command == "stats":
+            show_stats(archive)
+        elif args.command == "page":
+            html = archive.read_page(args.keyword, args.page, run=args.run)
+            if html is None:
+                print(f"'{args.keyword}' page {args.page} is not in the archive.")
+                sys.exit(1)
+            write_output(html, args.output)
+        elif args.command == "card":
+            html = archive.read_card(args.asin, run=args.run, keyword=args.keyword)
+            if html is None:
+                print(f"No archived card for ASIN {args.asin}.")
+                sys.exit(1)
+            write_output(html, args.output)
+        elif args.command == "train":
+            archive.train_dictionary()
+        elif args.command == "reparse":
+            reparse(archive, run=args.run, output=args.output)
+    finally:
+        archive.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from amazon_soft_toys_scraper import BASE_URL, build_chrome_options
+
+DAEMON_PORT = 8060
+
+class BrowserSlot:
+    """One long-lived Chrome session with its own persistent profile directory."""
+
+    def __init__(self, index, profile_dir):
+        self.index = index
+        self.profile_dir = profile_dir
+        self.driver = None
+        self.busy = False
+        self.pages = 0
+        self.started_at = None
+        self.leased_at = None
+        self.lease_id = None
+
+def process_memory_mb(profile_dir):
+    """Resident memory of every Chrome process using this profile (Linux /proc only, else None)."""
+    if not os.path.isdir("/proc"):
+        return None
+    marker = f"--user-data-dir={os.path.abspath(profile_dir)}".encode()
+    total_kb = 0
+    for pid in filter(str.isdigit, os.listdir("/proc")):
+        try:
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                if marker not in f.read():
+                    continue
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+                        break
+        except OSError:
+            continue  # Process exited while we were looking
+    return total_kb / 1024
+
+class BrowserDaemon:
+    """Keeps warmed Chrome sessions behind one chromedriver so scraper runs can attach instead of cold-starting."""
+
+    def __init__(self, slots=2, profile_root="browser_profiles", max_pages=50, max_memory_mb=1500,
+                 health_interval=30, lease_timeout=3600, warm_url=BASE_URL):
+        self.slots = [BrowserSlot(i, os.path.join(profile_root, f"slot-{i}")) for i in range(slots)]
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self.health_interval = health_interval
+        self.lease_timeout = lease_timeout
+        self.warm_url = warm_url
+        self.lock = threading.Lock()
+        self.service = None
+        self.cold_starts = []
+        self.attach_times = []
+        self.recycles = {}
+
+    def start(self):
+        """Start chromedriver and warm every slot."""
+        self.service = Service()
+        self.service.start()
+        print(f"chromedriver listening on {self.service.service_url}")
+        for slot in self.slots:
+            os.makedirs(slot.profile_dir, exist_ok=True)
+            self.start_session(slot)
+        threading.Thread(target=self.health_loop, daemon=True).start()
+
+    def start_session(self, slot):
+        """Open a Chrome session on the slot's profile and load the site once so the cache and cookies are warm."""
+        start = time.perf_counter()
+        slot.driver = webdriver.Remote(command_executor=self.service.service_url,
+                                       options=build_chrome_options(slot.profile_dir))
+        # Only session creation counts as the cold start: attaching loads no page either
+        elapsed = time.perf_counter() - start
+        slot.driver.get(self.warm_url)
+        warm_up = time.perf_counter() - start - elapsed
+        slot.pages = 0
+        slot.started_at = time.time()
+        self.cold_starts.append(elapsed)
+        print(f"Slot {slot.index}: session {slot.driver.session_id} started in {elapsed:.2f}s, "
+              f"warmed up in {warm_up:.2f}s more")
+
+    def stop_session(self, slot):
+        if slot.driver is not None:
+            try:
+                slot.driver.quit()
+            except Exception as e:
+                print(f"Slot {slot.index}: error closing session: {e}")
+            slot.driver = None
+
+    def recycle(self, slot, reason):
+        """Replace a slot's session. The caller must already hold the slot (busy=True)."""
+        print(f"Slot {slot.index}: recycling session ({reason})")
+        self.recycles[reason] = self.recycles.get(reason, 0) + 1
+        self.stop_session(slot)
+        try:
+            self.start_session(slot)
+        except Exception as e:
+            print(f"Slot {slot.index}: could not start a new session: {e}")
+
+    def is_healthy(self, slot):
+        """Cheap liveness probe: the browser still answers a script call."""
+        if slot.driver is None:
+            return False
+        try:
+            return slot.driver.execute_script("return document.readyState") is not None
+        except Exception:
+            return False
+
+    def recycle_reason(self, slot):
+        """Why a slot should be recycled, or None if it is fine."""
+        if not self.is_healthy(slot):
+            return "unhealthy"
+        if slot.pages >= self.max_pages:
+            return "page limit"
+        memory = process_memory_mb(slot.profile_dir)
+        if memory is not None and memory > self.max_memory_mb:
+            return "memory limit"
+        return None
+
+    def acquire(self):
+        """Lease a free warm session. Returns connection details, or None if every slot is busy.
+        The lease id must be sent with /renew and /release; it stops being valid once the lease is reclaimed."""
+        with self.lock:
+            slot = next((s for s in self.slots if not s.busy and s.driver is not None), None)
+            if slot is None:
+                return None
+            slot.busy = True
+            slot.leased_at = time.time()
+            slot.lease_id = uuid.uuid4().hex
+        return {
+            'slot': slot.index,
+            'lease_id': slot.lease_id,
+            'lease_timeout': self.lease_timeout,
+            'executor_url': self.service.service_url,
+            'session_id': slot.driver.session_id,
+            'cold_start_seconds': statistics.mean(self.cold_starts),
+        }
+
+    def renew(self, index, lease_id):
+        """Extend a lease that is still in use. Returns False if the lease is no longer held."""
+        slot = self.slots[index]
+        with self.lock:
+            if slot.lease_id != lease_id:
+                return False
+            slot.leased_at = time.time()
+        return True
+
+    def release(self, index, lease_id, pages=0, attach_seconds=None):
+        """Take a session back, recycling it if it hit the page or memory limit.
+        Returns False, and leaves the slot alone, if the lease was already reclaimed or released."""
+        slot = self.slots[index]
+        with self.lock:
+            if slot.lease_id != lease_id:
+                return False
+            slot.lease_id = None
+            slot.leased_at = None  # Still busy, but no longer subject to the abandoned-lease check
+        slot.pages += pages
+        if attach_seconds is not None:
+            self.attach_times.append(attach_seconds)
+        reason = self.recycle_reason(slot)
+        if reason:
+            self.recycle(slot, reason)
+        with self.lock:
+            slot.busy = False
+        return True
+
+    def health_loop(self):
+        """Periodically check idle slots, recycle dead or oversized sessions and reclaim abandoned leases
+        (leases not renewed for lease_timeout seconds, i.e. whose scraper process has gone away)."""
+        while True:
+            time.sleep(self.health_interval)
+            for slot in self.slots:
+                with self.lock:
+                    abandoned = slot.leased_at is not None and time.time() - slot.leased_at > self.lease_timeout
+                    if slot.busy and not abandoned:
+                        continue
+                    slot.busy = True  # Hold the slot while it is checked
+                    slot.leased_at = None
+                    slot.lease_id = None  # A late /release or /renew for the old lease is now rejected
+                if abandoned:
+                    reason = "lease abandoned"
+                else:
+                    reason = self.recycle_reason(slot) if slot.driver is not None else "no session"
+                if reason:
+                    self.recycle(slot, reason)
+                with self.lock:
+                    slot.busy = False
+
+    def health(self):
+        return [{
+            'slot': slot.index,
+            'busy': slot.busy,
+            'session_id': slot.driver.session_id if slot.driver else None,
+            'pages': slot.pages,
+            'uptime_seconds': round(time.time() - slot.started_at, 1) if slot.started_at else None,
+            'memory_mb': process_memory_mb(slot.profile_dir),
+        } for slot in self.slots]
+
+    def metrics(self):
+        """Cold start (Chrome session creation) versus attach timings, plus recycle counts; neither loads a page."""
+        def summary(values):
+            if not values:
+                return None
+            return {'count': len(values), 'mean': round(statistics.mean(values), 3),
+                    'median': round(statistics.median(values), 3), 'max': round(max(values), 3)}
+        cold, attach = summary(self.cold_starts), summary(self.attach_times)
+        return {
+            'cold_start_seconds': cold,
+            'attach_seconds': attach,
+            'speedup': round(cold['mean'] / attach['mean'], 1) if cold and attach and attach['mean'] else None,
+            'recycles': self.recycles,
+        }
+
+    def shutdown(self):
+        for slot in self.slots:
+            self.stop_session(slot)
+        if self.service is not None:
+            self.service.stop()
+
+def make_handler(daemon):
+    """Build the control-API request handler bound to a BrowserDaemon."""
+
+    class DaemonHandler(BaseHTTPRequestHandler):
+        def reply(self, status, body):
+            payload = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if self.path == '/health':
+                self.reply(200, {'slots': daemon.health()})
+            elif self.path == '/metrics':
+                self.reply(200, daemon.metrics())
+            else:
+                self.reply(404, {'error': f"Unknown endpoint {self.path}"})
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            body = json.loads(self.rfile.read(length) or b'{}')
+            if self.path == '/acquire':
+                lease = daemon.acquire()
+                if lease is None:
+                    self.reply(503, {'error': 'All browser sessions are busy'})
+                else:
+                    self.reply(200, lease)
+            elif self.path in ('/renew', '/release'):
+                try:
+                    index, lease_id = int(body['slot']), str(body['lease_id'])
+                    if self.path == '/renew':
+                        held = daemon.renew(index, lease_id)
+                    else:
+                        held = daemon.release(index, lease_id, int(body.get('pages', 0)), body.get('attach_seconds'))
+                except (KeyError, ValueError, IndexError) as e:
+                    self.reply(400, {'error': f"Bad {self.path[1:]} request: {e}"})
+                    return
+                if held:
+                    self.reply(200, {'slot': index, 'lease_id': lease_id})
+                else:
+                    self.reply(409, {'error': f"Lease {lease_id} on slot {index} is no longer held"})
+            else:
+                self.reply(404, {'error': f"Unknown endpoint {self.path}"})
+
+        def log_message(self, format, *args):
+            pass
+
+    return DaemonHandler
+
+def main(slots=2, port=DAEMON_PORT):
+    """Start the warm browser daemon and serve its control API on localhost."""
+    daemon = BrowserDaemon(slots=slots)
+    print(f"Starting browser daemon with {slots} warm session(s)...")
+    daemon.start()
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(daemon))
+    print(f"Browser daemon ready on http://127.0.0.1:{port} (endpoints: /acquire, /renew, /release, /health, /metrics)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down browser daemon...")
+    finally:
+        server.server_close()
+        daemon.shutdown()
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2)
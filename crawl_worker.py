@@ -0,0 +1,187 @@
+import argparse
+import glob
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+import pandas as pd
+import amazon_soft_toys_scraper as scraper
+from utils.crawl import HostRateLimiter, PAGE_RESULTS, PAGE_CAPTCHA, PAGE_EMPTY, PAGE_ERROR
+from utils.page_archive import PageArchive
+from utils.records import ProductBatch
+from utils.work_queue import SQLiteWorkQueue
+
+class LeaseHeartbeat(threading.Thread):
+    """Background thread that keeps a task's lease alive while the worker scrapes it."""
+
+    def __init__(self, queue, task, lease_seconds):
+        super().__init__(daemon=True)
+        self.queue = queue
+        self.task = task
+        self.lease_seconds = lease_seconds
+        self.stopped = threading.Event()
+        self.lost = False
+
+    def run(self):
+        while not self.stopped.wait(self.lease_seconds / 3):
+            if not self.queue.heartbeat(self.task, self.lease_seconds):
+                print(f"⚠️ Lost the lease on '{self.task['keyword']}' page {self.task['page']}")
+                self.lost = True
+                return
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+def append_to_shard(shard_file, records, lease_id):
+    """Append one page's records to this worker's shard, tagged with the lease they were scraped under."""
+    df = records.to_dataframe()
+    df['Lease'] = lease_id
+    df.to_csv(shard_file, mode='a', header=not os.path.exists(shard_file), index=False)
+
+def run_worker(queue_file, worker_id, shard_dir="shards", lease_seconds=300, max_pages=2, poll_interval=5,
+               archive_dir="page_archive"):
+    """Lease (keyword, page) tasks from the shared queue until none are left, writing results to a shard."""
+    queue = SQLiteWorkQueue(queue_file)
+    os.makedirs(shard_dir, exist_ok=True)
+    shard_file = os.path.join(shard_dir, f"{worker_id}.csv")
+    bucket = HostRateLimiter().bucket(urlparse(scraper.BASE_URL).netloc)
+    print(f"Worker {worker_id} starting (queue: {queue_file}, shard: {shard_file})")
+
+    # The worker id doubles as the archive run id, so archived pages line up with the shard
+    archive = PageArchive(archive_dir, run=worker_id) if archive_dir else None
+    driver = scraper.connect_driver()
+    pages_done = 0
+    try:
+        while True:
+            task = queue.lease(worker_id, lease_seconds)
+            if task is None:
+                counts = queue.stats()
+                if counts['pending'] == 0 and counts['leased'] == 0:
+                    break
+                time.sleep(poll_interval)  # Other workers may still add pages or hand tasks back
+                continue
+
+            keyword, page = task['keyword'], task['page']
+            heartbeat = LeaseHeartbeat(queue, task, lease_seconds)
+            heartbeat.start()
+            try:
+                bucket.acquire()
+                state = scraper.search_amazon(driver, keyword, page)
+                print(f"[{worker_id}] Page state for '{keyword}' page {page}: {state}")
+                if state != PAGE_RESULTS:
+                    scraper.archive_page(archive, keyword, page, driver.page_source, state)
+                if state in (PAGE_CAPTCHA, PAGE_ERROR):
+                    if state == PAGE_CAPTCHA:
+                        bucket.record_block()
+                    else:
+                        bucket.record_error()
+                    queue.fail(task, state, retry_delay=30 * 2 ** (task['attempts'] - 1))
+                    continue
+                bucket.record_success()
+
+                records = ProductBatch()
+                has_next_page = False
+                if state != PAGE_EMPTY:
+                    sponsored_data, has_next_page = scraper.scrape_results_page(driver, keyword, page, archive)
+                    records.extend(sponsored_data)
+            except Exception as e:
+                print(f"[{worker_id}] Error on '{keyword}' page {page}: {e}")
+                queue.fail(task, f"exception: {e}", retry_delay=30)
+                continue
+            finally:
+                heartbeat.stop()
+
+            if heartbeat.lost:
+                continue  # Another worker owns this task now; its copy of the results wins
+            if len(records):
+                append_to_shard(shard_file, records, task['lease_id'])
+            if page < max_pages and has_next_page:
+                queue.enqueue(keyword, page + 1)
+            if queue.complete(task):
+                pages_done += 1
+    finally:
+        scraper.release_driver(driver)
+        if archive:
+            archive.close()
+    print(f"Worker {worker_id} finished after {pages_done} page(s).")
+
+def merge_shards(queue_file, shard_dir="shards", output_file="soft_toys_sponsored.csv"):
+    """Combine worker shards, keeping only rows scraped under the lease that completed each task."""
+    queue = SQLiteWorkQueue(queue_file)
+    shard_files = sorted(glob.glob(os.path.join(shard_dir, "*.csv")))
+    if not shard_files:
+        print(f"No shards found in {shard_dir}.")
+        return None
+    df = pd.concat((pd.read_csv(path) for path in shard_files), ignore_index=True)
+    completed = set(queue.completed_leases().values())
+    merged = df[df['Lease'].isin(completed)].drop(columns=['Lease'])
+    print(f"Merged {len(shard_files)} shard(s): kept {len(merged)} of {len(df)} rows "
+          f"({len(df) - len(merged)} from abandoned or redelivered leases).")
+    merged.to_csv(output_file, index=False)
+    print(f"Saved merged results to {output_file}")
+
+    failed = queue.failed_tasks()
+    if failed:
+        print(f"⚠️ {len(failed)} task(s) failed permanently: "
+              + ", ".join(f"'{t['keyword']}' p{t['page']} ({t['last_error']})" for t in failed))
+    return merged
+
+def spawn_workers(count, args):
+    """Start several local worker processes against the same queue and wait for them."""
+    processes = []
+    for idx in range(count):
+        worker_id = f"{socket.gethostname()}-{os.getpid()}-{idx}"
+        cmd = [sys.executable, __file__, "--queue", args.queue, "--base-url", args.base_url,
+               "work", "--worker-id", worker_id, "--shard-dir", args.shard_dir,
+               "--lease-seconds", str(args.lease_seconds), "--max-pages", str(args.max_pages),
+               "--archive-dir", args.archive_dir]
+        processes.append(subprocess.Popen(cmd))
+    return [process.wait() for process in processes]
+
+def main():
+    """Command-line entry point: enqueue keywords, run or spawn workers, merge shards."""
+    parser = argparse.ArgumentParser(description="Shared-queue crawl workers for the Amazon scraper")
+    parser.add_argument("--queue", default="crawl_queue.sqlite", help="SQLite queue file (on shared storage for several hosts)")
+    parser.add_argument("--base-url", default=scraper.BASE_URL, help="Site to crawl, e.g. a local stand-in server")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    enqueue = commands.add_parser("enqueue", help="Add search keywords (page 1) to the queue")
+    enqueue.add_argument("keywords", nargs="+")
+
+    for name in ("work", "spawn"):
+        command = commands.add_parser(name, help="Run one worker" if name == "work" else "Run N local worker processes")
+        if name == "work":
+            command.add_argument("--worker-id", default=f"{socket.gethostname()}-{os.getpid()}")
+        else:
+            command.add_argument("count", type=int)
+        command.add_argument("--shard-dir", default="shards")
+        command.add_argument("--lease-seconds", type=int, default=300)
+        command.add_argument("--archive-dir", default="page_archive", help="Compressed raw-page archive")
+        command.add_argument("--max-pages", type=int, default=2)
+
+    merge = commands.add_parser("merge", help="Combine worker shards into one CSV")
+    merge.add_argument("--shard-dir", default="shards")
+    merge.add_argument("--output", default="soft_toys_sponsored.csv")
+
+    args = parser.parse_args()
+    scraper.BASE_URL = args.base_url.rstrip('/')
+
+    if args.command == "enqueue":
+        queue = SQLiteWorkQueue(args.queue)
+        added = sum(queue.enqueue(keyword) for keyword in args.keywords)
+        print(f"Queued {added} new keyword(s). Queue status: {queue.stats()}")
+    elif args.command == "work":
+        run_worker(args.queue, args.worker_id, args.shard_dir, args.lease_seconds, args.max_pages,
+                   archive_dir=args.archive_dir)
+    elif args.command == "spawn":
+        exit_codes = spawn_workers(args.count, args)
+        print(f"Workers exited with codes {exit_codes}. Queue status: {SQLiteWorkQueue(args.queue).stats()}")
+    elif args.command == "merge":
+        merge_shards(args.queue, args.shard_dir, args.output)
+
+if __name__ == "__main__":
+    main()
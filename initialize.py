@@ -67,7 +67,8 @@ def main():
         "part2_cleaning.py",
         "part3_analysis_brand.py",
         "part3_analysis_price_rating.py",
-        "part3_analysis_reviews.py"
+        "part3_analysis_reviews.py",
+        "part3_aggregate_cube.py"
     ]
     
     # Run each script
@@ -83,6 +84,11 @@ def main():
     else:
         print("✗ Cleaned data file 'soft_toys_cleaned.csv' not found.")
     
+    if os.path.exists("soft_toys_cube.csv"):
+        print("✓ Aggregate cube saved to 'soft_toys_cube.csv'.")
+    else:
+        print("✗ Aggregate cube file 'soft_toys_cube.csv' not found.")
+    
     output_dir = "output"
     if os.path.exists(output_dir):
         plots = [
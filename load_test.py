@@ -0,0 +1,190 @@
+import argparse
+import glob
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+import pandas as pd
+from mock_amazon_server import MOCK_PORT, MockAmazon, add_config_arguments, config_from_args, start_server
+
+KEYWORDS = ['soft toys', 'teddy bear', 'plush unicorn', 'stuffed panda', 'baby soft toys', 'giant teddy']
+ASIN_PATTERN = re.compile(r"dp(?:/|%2F)(B0[A-Z0-9]{8})")
+
+def process_tree_memory_mb(root_pids):
+    """Resident memory of the given processes and all their descendants (chromedriver, Chrome), Linux /proc only."""
+    parents = {}
+    for pid in filter(str.isdigit, os.listdir("/proc")):
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                # The command name may contain spaces, so split after its closing parenthesis
+                parents[int(pid)] = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+    tree = set(root_pids)
+    grew = True
+    while grew:
+        children = {pid for pid, parent in parents.items() if parent in tree} - tree
+        tree |= children
+        grew = bool(children)
+    total_kb = 0
+    for pid in tree:
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+                        break
+        except OSError:
+            continue
+    return total_kb / 1024
+
+class MemorySampler(threading.Thread):
+    """Samples the scrapers' process-tree memory in the background and keeps the peak."""
+
+    def __init__(self, processes, interval=0.5):
+        super().__init__(daemon=True)
+        self.processes = processes
+        self.interval = interval
+        self.peak_mb = 0.0
+        self.stopped = threading.Event()
+
+    def run(self):
+        if not os.path.isdir("/proc"):
+            return
+        while not self.stopped.is_set():
+            pids = [process.pid for process in self.processes if process.poll() is None]
+            self.peak_mb = max(self.peak_mb, process_tree_memory_mb(pids))
+            self.stopped.wait(self.interval)
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+def run_scraper(base_url, keyword, max_pages):
+    """Run the real scraper main() against base_url (called in a worker subprocess)."""
+    import amazon_soft_toys_scraper as scraper
+    scraper.BASE_URL = base_url.rstrip('/')
+    scraper.main(search_terms=(keyword,), max_pages=max_pages)
+
+def worker_keywords(concurrency):
+    """One distinct search term per scraper process."""
+    return [KEYWORDS[i % len(KEYWORDS)] + (f" {i // len(KEYWORDS) + 1}" if i >= len(KEYWORDS) else "")
+            for i in range(concurrency)]
+
+def detection_accuracy(mock, results):
+    """Compare scraped products with the cards the server marked sponsored. Returns (precision, recall)."""
+    true_positives = false_positives = false_negatives = 0
+    for keyword, csv_file in results.items():
+        truth = mock.truth(keyword)
+        sponsored, organic = set(truth['sponsored']), set(truth['organic'])
+        scraped = set()
+        if csv_file and os.path.exists(csv_file):
+            urls = pd.read_csv(csv_file)['Product URL'].dropna()
+            scraped = {match.group(1) for match in urls.map(ASIN_PATTERN.search) if match}
+        true_positives += len(scraped & sponsored)
+        false_positives += len(scraped & organic)
+        false_negatives += len(sponsored - scraped)
+    precision = true_positives / (true_positives + false_positives) if true_positives + false_positives else None
+    recall = true_positives / (true_positives + false_negatives) if true_positives + false_negatives else None
+    return precision, recall
+
+def run_level(mock, base_url, concurrency, max_pages, run_dir):
+    """Run `concurrency` scraper processes at once against the mock server and measure the run."""
+    mock.reset()
+    level_dir = os.path.join(run_dir, f"concurrency-{concurrency}")
+    processes, results, logs = [], {}, []
+    start = time.perf_counter()
+    for index, keyword in enumerate(worker_keywords(concurrency)):
+        worker_dir = os.path.join(level_dir, f"worker-{index}")
+        os.makedirs(worker_dir, exist_ok=True)
+        log = open(os.path.join(worker_dir, "scraper.log"), "w")
+        logs.append(log)
+        cmd = [sys.executable, os.path.abspath(__file__), "scrape", "--base-url", base_url,
+               "--keyword", keyword, "--max-pages", str(max_pages)]
+        processes.append(subprocess.Popen(cmd, cwd=worker_dir, stdout=log, stderr=subprocess.STDOUT))
+        results[keyword] = os.path.join(worker_dir, f"{keyword.replace(' ', '_')}_sponsored.csv")
+    sampler = MemorySampler(processes)
+    sampler.start()
+    exit_codes = [process.wait() for process in processes]
+    elapsed = time.perf_counter() - start
+    sampler.stop()
+    for log in logs:
+        log.close()
+
+    products = sum(len(pd.read_csv(path)) for path in results.values() if os.path.exists(path))
+    with mock.lock:
+        stats = dict(mock.stats)
+    precision, recall = detection_accuracy(mock, results)
+    minutes = elapsed / 60
+    return {
+        'Concurrency': concurrency,
+        'Seconds': round(elapsed, 1),
+        'Pages': stats['results_pages'],
+        'Products': products,
+        'Pages/min': round(stats['results_pages'] / minutes, 1),
+        'Products/min': round(products / minutes, 1),
+        'Peak Memory (MB)': round(sampler.peak_mb, 1),
+        'Precision': round(precision, 3) if precision is not None else None,
+        'Recall': round(recall, 3) if recall is not None else None,
+        'Captchas': stats['captchas'],
+        'Errors': stats['errors'],
+        'Failed Workers': sum(1 for code in exit_codes if code != 0),
+    }
+
+def run_load_test(args):
+    """Start the mock server, run every concurrency level in turn and print / save the report."""
+    mock = MockAmazon(config_from_args(args))
+    server = start_server(mock, args.port)
+    base_url = f"http://127.0.0.1:{args.port}"
+    run_dir = os.path.abspath(os.path.join(args.run_dir, time.strftime("%Y%m%d-%H%M%S")))
+    print(f"Mock Amazon on {base_url}; scraper logs and CSVs go to {run_dir}")
+
+    rows = []
+    try:
+        for concurrency in args.concurrency:
+            print(f"\nRunning {concurrency} scraper process(es)...")
+            row = run_level(mock, base_url, concurrency, args.max_pages, run_dir)
+            print(", ".join(f"{key}: {value}" for key, value in row.items()))
+            if row['Failed Workers']:
+                print(f"⚠️ {row['Failed Workers']} scraper(s) exited with an error, see "
+                      + ", ".join(glob.glob(os.path.join(run_dir, f"concurrency-{concurrency}", "*", "scraper.log"))))
+            rows.append(row)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    report = pd.DataFrame(rows)
+    print("\nLoad Test Report:")
+    print(report.to_string(index=False))
+    report_file = os.path.join(run_dir, "load_test_report.csv")
+    report.to_csv(report_file, index=False)
+    print(f"\nReport saved to {report_file}")
+    return report
+
+def main():
+    """Command-line entry point: run the load test, or (internally) one scraper process."""
+    parser = argparse.ArgumentParser(description="End-to-end load test of the scraper against the mock Amazon server")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run the scraper at several concurrency levels against the mock server")
+    run.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4], help="Scraper processes per level")
+    run.add_argument("--max-pages", type=int, default=2)
+    run.add_argument("--port", type=int, default=MOCK_PORT)
+    run.add_argument("--run-dir", default="load_test_runs")
+    add_config_arguments(run)
+
+    scrape = commands.add_parser("scrape", help="Run one scraper against a base URL (used by 'run')")
+    scrape.add_argument("--base-url", required=True)
+    scrape.add_argument("--keyword", required=True)
+    scrape.add_argument("--max-pages", type=int, default=2)
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run_load_test(args)
+    else:
+        run_scraper(args.base_url, args.keyword, args.max_pages)
+
+if __name__ == "__main__":
+    main()
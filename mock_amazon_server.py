@@ -0,0 +1,351 @@
+import argparse
+import hashlib
+import html
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, quote_plus, urlparse
+
+MOCK_PORT = 8070
+
+BRANDS = ['HappyBuddy', 'PandasBox', 'Storio', 'HUGFEEL', 'LOVEYDOVEY', 'Mirada', 'Ultra', 'Teddyland',
+          'FluffyFriends', 'HappyTails', 'Webby', 'Babique', 'Hamleys', 'Archies', 'DearJoy']
+ADJECTIVES = ['Soft', 'Cuddly', 'Plush', 'Giant', 'Musical', 'Talking', 'Fluffy', 'Mini', 'Premium', 'Huggable']
+ANIMALS = ['Teddy Bear', 'Unicorn', 'Panda', 'Bunny', 'Elephant', 'Lion', 'Dinosaur', 'Penguin', 'Puppy', 'Kitten']
+
+# Sponsored label markups seen on real result cards (each one is recognised by utils.sponsored)
+SPONSORED_LABELS = [
+    '<div class="a-row a-spacing-micro"><span class="a-declarative" data-action="a-popover">'
+    '<a aria-label="View Sponsored information or leave ad feedback" class="puis-label-popover puis-sponsored-label-text" role="button">'
+    '<span class="puis-label-popover-default"><span class="a-color-secondary">Sponsored</span></span></a></span></div>',
+    '<div class="a-row a-spacing-micro"><span class="puis-sponsored-label a-color-secondary">Sponsored Ad</span></div>',
+    '<div class="a-row"><span class="sponsored-label-text">Sponsored ad from {brand}</span></div>',
+    '<div class="a-row a-spacing-micro"><div class="a-section a-text-bold"> SPONSORED </div></div>',
+]
+# Organic badges that mention neither a label class nor a standalone "Sponsored"
+ORGANIC_BADGES = [
+    '',
+    '<div class="a-row a-spacing-micro"><span class="a-badge-text">Best Seller</span></div>',
+    '<div class="a-row a-spacing-micro"><span class="a-color-secondary">Amazon\'s Choice</span></div>',
+]
+
+PAGE_STYLE = ("body{font-family:Arial,sans-serif;margin:0}"
+              ".s-result-item{display:block;min-height:320px;border-bottom:1px solid #ddd;padding:8px}"
+              ".s-pagination-container{padding:24px}")
+
+class MockConfig:
+    """Knobs for the stand-in server: page shape, sponsored share and fault injection."""
+
+    def __init__(self, latency=0.2, jitter=0.1, sponsored_ratio=0.25, error_rate=0.0, captcha_rate=0.0,
+                 products_per_page=48, initial_products=16, scroll_batch=16, pages=5, seed=7,
+                 empty_keywords=('no such toy',)):
+        self.latency = latency  # seconds added to every page / fragment response
+        self.jitter = jitter
+        self.sponsored_ratio = sponsored_ratio
+        self.error_rate = error_rate  # share of page loads answered with a 503
+        self.captcha_rate = captcha_rate  # share of page loads answered with a robot check
+        self.products_per_page = products_per_page
+        self.initial_products = initial_products  # cards in the HTML; the rest arrive while scrolling
+        self.scroll_batch = scroll_batch
+        self.pages = pages  # results pages per keyword
+        self.seed = seed
+        self.empty_keywords = set(empty_keywords)
+
+    def as_dict(self):
+        values = dict(vars(self))
+        values['empty_keywords'] = sorted(self.empty_keywords)
+        return values
+
+def slugify(text):
+    return '-'.join(text.split())
+
+class MockCatalog:
+    """Deterministic fake products for every (keyword, page): the same seed always gives the same pages."""
+
+    def __init__(self, config):
+        self.config = config
+        self.cache = {}
+
+    def products(self, keyword, page):
+        key = (keyword, page)
+        if key not in self.cache:
+            rng = random.Random(f"{self.config.seed}:{keyword}:{page}")
+            products = []
+            for index in range(self.config.products_per_page):
+                digest = hashlib.sha1(f"{self.config.seed}:{keyword}:{page}:{index}".encode()).hexdigest()
+                brand = rng.choice(BRANDS)
+                title = (f"{brand} {rng.choice(ADJECTIVES)} {rng.choice(ANIMALS)} Plush Toy "
+                         f"for Kids, {rng.choice([25, 30, 40, 60, 90])} cm")
+                sponsored = rng.random() < self.config.sponsored_ratio
+                products.append({
+                    'asin': 'B0' + digest[:8].upper(),
+                    'title': title,
+                    'brand': brand,
+                    'rating': round(rng.uniform(2.5, 5.0), 1) if rng.random() > 0.05 else None,
+                    'reviews': int(rng.paretovariate(1.2) * 20) if rng.random() > 0.08 else None,
+                    'price': rng.choice([199, 249, 299, 349, 399, 499, 599, 799, 999, 1299, 1499, 2499]),
+                    'sponsored': sponsored,
+                    'badge': rng.randrange(len(SPONSORED_LABELS) if sponsored else len(ORGANIC_BADGES)),
+                })
+            self.cache[key] = products
+        return self.cache[key]
+
+def render_card(product, index):
+    """One result card in Amazon's search-result markup (the parts extract_product_info reads)."""
+    slug = slugify(product['title'].replace(',', ''))
+    if product['sponsored']:
+        path = f"/{slug}/dp/{product['asin']}/ref=sr_1_{index}_sspa"
+        href = f"/sspa/click?ie=UTF8&spc=MTo1&url={quote(path, safe='')}"
+        badge = SPONSORED_LABELS[product['badge']].format(brand=html.escape(product['brand']))
+        classes = "s-result-item s-asin sg-col-4-of-24 sg-col AdHolder"
+    else:
+        href = f"/{slug}/dp/{product['asin']}/ref=sr_1_{index}"
+        badge = ORGANIC_BADGES[product['badge']]
+        classes = "s-result-item s-asin sg-col-4-of-24 sg-col"
+    href = html.escape(href)
+    title = html.escape(product['title'])
+    rating = (f'<span aria-label="{product["rating"]} out of 5 stars"><i class="a-icon a-icon-star-small">'
+              f'<span class="a-icon-alt">{product["rating"]} out of 5 stars</span></i></span>'
+              if product['rating'] is not None else '')
+    reviews = (f'<span aria-label="{product["reviews"]:,} ratings"><a class="a-link-normal s-underline-text" '
+               f'href="{href}#customerReviews"><span class="a-size-base s-underline-text" dir="auto">'
+               f'{product["reviews"]:,}</span></a></span>' if product['reviews'] is not None else '')
+    return (
+        f'<div data-asin="{product["asin"]}" data-index="{index}" data-component-type="s-search-result" class="{classes}">'
+        f'<div class="sg-col-inner"><div class="puis-card-container s-card-container">'
+        f'<span data-component-type="s-product-image"><a class="a-link-normal s-no-outline" href="{href}">'
+        f'<img class="s-image" src="https://m.media-amazon.com/images/I/{product["asin"]}._AC_UL320_.jpg" alt="{title}"></a></span>'
+        f'{badge}'
+        f'<div class="a-row a-color-secondary"><h2 class="a-size-mini s-line-clamp-1">'
+        f'<span class="a-size-base-plus a-color-base">{html.escape(product["brand"])}</span></h2></div>'
+        f'<h2 class="a-size-mini a-spacing-none a-color-base s-line-clamp-4"><a class="a-link-normal s-link-style a-text-normal" href="{href}">'
+        f'<span class="a-size-base-plus a-color-base a-text-normal">{title}</span></a></h2>'
+        f'<div class="a-row a-size-small">{rating}{reviews}</div>'
+        f'<div class="a-row a-size-base a-color-base"><span class="a-price"><span class="a-offscreen">&#8377;{product["price"]:,}</span>'
+        f'<span aria-hidden="true"><span class="a-price-symbol">&#8377;</span><span class="a-price-whole">{product["price"]:,}</span></span></span></div>'
+        f'</div></div></div>'
+    )
+
+def render_page(title, body, script=''):
+    return (f'<!doctype html><html><head><meta charset="utf-8"><title>{html.escape(title)}</title>'
+            f'<style>{PAGE_STYLE}</style></head><body>{body}{script}</body></html>')
+
+def render_home():
+    return render_page("Amazon.in (mock)",
+                       '<form action="/s" method="get"><input id="twotabsearchtextbox" name="k" type="text">'
+                       '<input type="submit" value="Go"></form>')
+
+def render_captcha():
+    return render_page("Amazon.in (mock)",
+                       '<form method="get" action="/errors/validateCaptcha"><h4>Enter the characters you see below</h4>'
+                       '<p>Sorry, we just need to make sure you\'re not a robot.</p><input id="captchacharacters" name="field-keywords"></form>')
+
+def render_empty(keyword):
+    return render_page("Amazon.in (mock)",
+                       f'<div class="s-no-outline"><span>No results for </span><span class="a-text-bold">{html.escape(keyword)}</span></div>')
+
+def render_results(keyword, page, products, config):
+    """A results page with the first cards inline, infinite-scroll loading for the rest, and pagination."""
+    initial = products[:config.initial_products]
+    cards = ''.join(render_card(product, index) for index, product in enumerate(initial, 1))
+    query = quote_plus(keyword)
+    if page < config.pages:
+        next_link = (f'<a href="/s?k={query}&amp;page={page + 1}" '
+                     f'class="s-pagination-item s-pagination-next s-pagination-button">Next</a>')
+    else:
+        next_link = '<span class="s-pagination-item s-pagination-next s-pagination-disabled">Next</span>'
+    pagination = (f'<div class="s-pagination-container"><span class="s-pagination-strip">'
+                  f'<span class="s-pagination-item s-pagination-selected">{page}</span>{next_link}</span></div>')
+    # Load the next batch of cards whenever the viewport gets near the bottom, like the real results page
+    script = ('<script>(function(){var offset=%d,total=%d,loading=false;'
+              'function more(){if(loading||offset>=total)return;'
+              'if(window.innerHeight+window.scrollY<document.body.offsetHeight-1500)return;'
+              'loading=true;fetch("/_cards?k=%s&page=%d&offset="+offset).then(function(r){return r.text();})'
+              '.then(function(h){document.getElementById("search-results").insertAdjacentHTML("beforeend",h);'
+              'offset+=%d;loading=false;more();}).catch(function(){loading=false;});}'
+              'window.addEventListener("scroll",more);})();</script>'
+              % (len(initial), len(products), query, page, config.scroll_batch))
+    body = (f'<div id="search"><span>1-{len(products)} of over 10,000 results for "{html.escape(keyword)}"</span>'
+            f'<div id="search-results" class="s-main-slot s-result-list">{cards}</div>{pagination}</div>')
+    return render_page(f"Amazon.in : {keyword}", body, script)
+
+class MockAmazon:
+    """Serves the mock pages, injects faults and records which cards were delivered (the ground truth)."""
+
+    def __init__(self, config=None):
+        self.config = config or MockConfig()
+        self.catalog = MockCatalog(self.config)
+        self.lock = threading.Lock()
+        self.rng = random.Random(self.config.seed)
+        self.reset()
+
+    def reset(self):
+        """Clear counters and delivered-card records (e.g. between load-test runs)."""
+        with self.lock:
+            self.stats = {'requests': 0, 'home_pages': 0, 'results_pages': 0, 'empty_pages': 0,
+                          'fragments': 0, 'captchas': 0, 'errors': 0}
+            self.delivered = {}  # keyword -> {asin: sponsored}
+
+    def count(self, name):
+        with self.lock:
+            self.stats[name] += 1
+
+    def deliver(self, keyword, products):
+        with self.lock:
+            cards = self.delivered.setdefault(keyword, {})
+            for product in products:
+                cards[product['asin']] = product['sponsored']
+
+    def delay(self):
+        wait = self.config.latency + self.rng.uniform(-self.config.jitter, self.config.jitter)
+        if wait > 0:
+            time.sleep(wait)
+
+    def injected_fault(self):
+        """Roll for a captcha or server error on a page load. Returns 'captcha', 'error' or None."""
+        with self.lock:
+            roll = self.rng.random()
+        if roll < self.config.captcha_rate:
+            self.count('captchas')
+            return 'captcha'
+        if roll < self.config.captcha_rate + self.config.error_rate:
+            self.count('errors')
+            return 'error'
+        return None
+
+    def results(self, keyword, page):
+        """Status and HTML for a search request."""
+        if keyword in self.config.empty_keywords or page > self.config.pages:
+            self.count('empty_pages')
+            return 200, render_empty(keyword)
+        products = self.catalog.products(keyword, page)
+        self.deliver(keyword, products[:self.config.initial_products])
+        self.count('results_pages')
+        return 200, render_results(keyword, page, products, self.config)
+
+    def fragment(self, keyword, page, offset):
+        """Cards loaded by the infinite-scroll script."""
+        products = self.catalog.products(keyword, page)[offset:offset + self.config.scroll_batch]
+        self.deliver(keyword, products)
+        self.count('fragments')
+        start = offset + 1
+        return ''.join(render_card(product, index) for index, product in enumerate(products, start))
+
+    def truth(self, keyword):
+        """Sponsored and organic ASINs of every card actually delivered for a keyword."""
+        with self.lock:
+            cards = dict(self.delivered.get(keyword, {}))
+        return {
+            'keyword': keyword,
+            'sponsored': sorted(asin for asin, sponsored in cards.items() if sponsored),
+            'organic': sorted(asin for asin, sponsored in cards.items() if not sponsored),
+        }
+
+def make_handler(mock):
+    """Build the request handler bound to a MockAmazon instance."""
+
+    class MockHandler(BaseHTTPRequestHandler):
+        def send(self, status, body, content_type='text/html; charset=utf-8'):
+            payload = body.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = parse_qs(url.query)
+            keyword = params.get('k', [''])[0]
+            mock.count('requests')
+
+            if url.path == '/_truth':
+                self.send(200, json.dumps(mock.truth(keyword)), 'application/json')
+                return
+            if url.path == '/_stats':
+                with mock.lock:
+                    stats = dict(mock.stats)
+                self.send(200, json.dumps({'stats': stats, 'config': mock.config.as_dict()}), 'application/json')
+                return
+
+            mock.delay()
+            if url.path == '/_cards':
+                try:
+                    page = int(params.get('page', ['1'])[0])
+                    offset = int(params.get('offset', ['0'])[0])
+                except ValueError:
+                    self.send(400, '')
+                    return
+                self.send(200, mock.fragment(keyword, page, offset))
+                return
+            if url.path not in ('/', '/s'):
+                self.send(404, render_page("Page Not Found", "<p>Looking for something?</p>"))
+                return
+
+            fault = mock.injected_fault()
+            if fault == 'captcha':
+                self.send(200, render_captcha())
+            elif fault == 'error':
+                self.send(503, render_page("Service Unavailable", "<p>Service Unavailable</p>"))
+            elif url.path == '/':
+                mock.count('home_pages')
+                self.send(200, render_home())
+            else:
+                try:
+                    page = int(params.get('page', ['1'])[0])
+                except ValueError:
+                    page = 1
+                self.send(*mock.results(keyword, page))
+
+        def log_message(self, format, *args):
+            pass
+
+    return MockHandler
+
+def start_server(mock, port=MOCK_PORT):
+    """Serve a MockAmazon on localhost from a background thread. Returns the server (call shutdown() to stop)."""
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(mock))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def add_config_arguments(parser):
+    """Command-line options for MockConfig, shared with the load-test harness."""
+    defaults = MockConfig()
+    parser.add_argument("--latency", type=float, default=defaults.latency, help="Seconds added to each response")
+    parser.add_argument("--jitter", type=float, default=defaults.jitter)
+    parser.add_argument("--sponsored-ratio", type=float, default=defaults.sponsored_ratio)
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate, help="Share of page loads answered with 503")
+    parser.add_argument("--captcha-rate", type=float, default=defaults.captcha_rate, help="Share of page loads answered with a robot check")
+    parser.add_argument("--products-per-page", type=int, default=defaults.products_per_page)
+    parser.add_argument("--initial-products", type=int, default=defaults.initial_products, help="Cards before any scrolling")
+    parser.add_argument("--pages", type=int, default=defaults.pages, help="Results pages per keyword")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+def config_from_args(args):
+    return MockConfig(latency=args.latency, jitter=args.jitter, sponsored_ratio=args.sponsored_ratio,
+                      error_rate=args.error_rate, captcha_rate=args.captcha_rate,
+                      products_per_page=args.products_per_page, initial_products=args.initial_products,
+                      pages=args.pages, seed=args.seed)
+
+def main():
+    """Run the mock search site on its own (point the scraper at it with --base-url / BASE_URL)."""
+    parser = argparse.ArgumentParser(description="Local stand-in for the Amazon search pages")
+    parser.add_argument("--port", type=int, default=MOCK_PORT)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    mock = MockAmazon(config_from_args(args))
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), make_handler(mock))
+    print(f"Mock Amazon ready on http://127.0.0.1:{args.port} (ground truth: /_truth?k=..., counters: /_stats)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down mock server...")
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
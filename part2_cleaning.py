@@ -48,24 +48,29 @@ def clean_rating(rating):
     except (ValueError, TypeError):
         return None
 
-def clean_data(df):
-    """Clean and prepare the DataFrame."""
-    print("Starting data cleaning...")
-    
-    # Remove duplicates based on Product URL (unique identifier)
-    initial_rows = len(df)
-    df = df.drop_duplicates(subset=['Product URL'], keep='first')
-    print(f"Removed {initial_rows - len(df)} duplicate rows. {len(df)} rows remain.")
-    
+def normalize_columns(df):
+    """Convert and standardize the columns of raw scraped rows (no deduplication, no output).
+    Shared by clean_data and the streaming pipeline, which cleans one page of rows at a time."""
     # Convert text columns to string type, handling NaN
     text_columns = ['Title', 'Brand', 'Image URL', 'Product URL']
     for col in text_columns:
-        df[col] = df[col].astype(str).fillna('').replace('nan', '')
+        df[col] = df[col].fillna('').astype(str).replace('nan', '')
     
     # Clean and convert numeric columns
-    df['Price'] = df['Price'].apply(clean_price)
-    df['Reviews'] = df['Reviews'].apply(clean_reviews)
-    df['Rating'] = df['Rating'].apply(clean_rating)
+    # (the scraper now writes typed numbers with blanks for missing values, so only
+    # legacy text exports such as "N/A" / "1,299" need the per-value regex pass)
+    if pd.api.types.is_numeric_dtype(df['Price']):
+        df['Price'] = df['Price'].astype(float)
+    else:
+        df['Price'] = df['Price'].apply(clean_price)
+    if pd.api.types.is_numeric_dtype(df['Reviews']):
+        df['Reviews'] = df['Reviews'].fillna(0).astype(int)
+    else:
+        df['Reviews'] = df['Reviews'].apply(clean_reviews)
+    if pd.api.types.is_numeric_dtype(df['Rating']):
+        df['Rating'] = df['Rating'].astype(float)
+    else:
+        df['Rating'] = df['Rating'].apply(clean_rating)
     
     # Standardize text columns
     df['Title'] = df['Title'].str.strip().replace('N/A', '')
@@ -83,6 +88,21 @@ def clean_data(df):
     # Drop 'Is Sponsored' column if present (not needed for analysis)
     if 'Is Sponsored' in df.columns:
         df = df.drop(columns=['Is Sponsored'])
+    
+    return df
+
+def clean_data(df):
+    """Clean and prepare the DataFrame."""
+    print("Starting data cleaning...")
+    
+    # Remove duplicates based on Product URL (unique identifier)
+    initial_rows = len(df)
+    df = df.drop_duplicates(subset=['Product URL'], keep='first')
+    print(f"Removed {initial_rows - len(df)} duplicate rows. {len(df)} rows remain.")
+    
+    had_sponsored_column = 'Is Sponsored' in df.columns
+    df = normalize_columns(df)
+    if had_sponsored_column:
         print("Dropped 'Is Sponsored' column.")
     
     # Verify data types
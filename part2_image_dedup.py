@@ -0,0 +1,111 @@
+import pandas as pd
+import numpy as np
+import urllib.request
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+from utils.dedup import BKTree, UnionFind
+
+HASH_SIZE = 8  # 8x8 low-frequency DCT block -> 64-bit hash
+IMAGE_SIZE = 32  # Thumbnails are shrunk to 32x32 greyscale before the DCT
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36"
+
+def load_data(file_path):
+    """Load the cleaned CSV file."""
+    try:
+        print(f"Loading cleaned data from {file_path}...")
+        df = pd.read_csv(file_path)
+        print(f"Loaded {len(df)} rows.")
+        return df
+    except Exception as e:
+        print(f"Error loading data: {e}")
+        return None
+
+def fetch_thumbnail(url, timeout=10):
+    """Download one thumbnail and return it as a 32x32 greyscale array, or None on failure."""
+    try:
+        request = urllib.request.Request(url, headers={'User-Agent': USER_AGENT})
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            payload = response.read()
+        image = Image.open(io.BytesIO(payload)).convert('L').resize((IMAGE_SIZE, IMAGE_SIZE), Image.LANCZOS)
+        return np.asarray(image, dtype=np.float32)
+    except Exception as e:
+        print(f"Could not fetch thumbnail {url[:60]}: {e}")
+        return None
+
+def download_thumbnails(urls, max_workers=16, timeout=10):
+    """Download each distinct URL once, concurrently. Returns {url: pixels or None}."""
+    unique_urls = [url for url in dict.fromkeys(urls) if isinstance(url, str) and url.startswith(('http://', 'https://', 'file://'))]
+    print(f"Downloading {len(unique_urls)} unique thumbnails with {max_workers} workers...")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pixels = executor.map(lambda url: fetch_thumbnail(url, timeout), unique_urls)
+        return dict(zip(unique_urls, pixels))
+
+def dct_matrix(n):
+    """Orthonormal DCT-II basis matrix of size n x n."""
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    matrix = np.sqrt(2.0 / n) * np.cos(np.pi * (2 * i + 1) * k / (2 * n))
+    matrix[0, :] = np.sqrt(1.0 / n)
+    return matrix
+
+def compute_phashes(images):
+    """Compute 64-bit perceptual hashes for a (N, 32, 32) batch of greyscale images in one pass."""
+    images = np.asarray(images, dtype=np.float32)
+    if len(images) == 0:
+        return []
+    dct = dct_matrix(IMAGE_SIZE).astype(np.float32)
+    # 2D DCT of every image at once: D @ img @ D.T
+    coefficients = np.einsum('ij,njk,lk->nil', dct, images, dct)[:, :HASH_SIZE, :HASH_SIZE]
+    coefficients = coefficients.reshape(len(images), -1)
+    # Compare against the median of the block, ignoring the DC term
+    medians = np.median(coefficients[:, 1:], axis=1, keepdims=True)
+    bits = np.packbits(coefficients > medians, axis=1)
+    return [int(value) for value in bits.view('>u8').ravel()]
+
+def cluster_near_duplicates(hashes, max_distance=6):
+    """Group hashes within max_distance bits of each other. Returns a cluster label per hash."""
+    tree = BKTree()
+    for idx, value in enumerate(hashes):
+        tree.add(value, idx)
+    clusters = UnionFind(len(hashes))
+    for idx, value in enumerate(hashes):
+        for match in tree.query(value, max_distance):
+            clusters.union(idx, match)
+    return clusters.labels()
+
+def add_image_clusters(df, max_distance=6, max_workers=16):
+    """Add an 'Image Cluster' column grouping listings whose thumbnails are near-duplicates."""
+    print("\nDetecting duplicate listings by thumbnail...")
+    pixels_by_url = download_thumbnails(df['Image URL'], max_workers=max_workers)
+    hashed_urls = [url for url, pixels in pixels_by_url.items() if pixels is not None]
+    print(f"Hashing {len(hashed_urls)} thumbnails...")
+    hashes = compute_phashes([pixels_by_url[url] for url in hashed_urls])
+    labels = cluster_near_duplicates(hashes, max_distance=max_distance)
+    cluster_by_url = dict(zip(hashed_urls, labels))
+
+    df = df.copy()
+    df['Image Cluster'] = df['Image URL'].map(cluster_by_url).astype('Int64')
+
+    cluster_sizes = df['Image Cluster'].value_counts()
+    duplicates = cluster_sizes[cluster_sizes > 1]
+    print(f"Found {len(duplicates)} clusters covering {int(duplicates.sum())} listings with the same photo.")
+    print(f"{int(df['Image Cluster'].isna().sum())} listings have no usable thumbnail.")
+    return df
+
+def main(input_file="soft_toys_cleaned.csv"):
+    """Main function to tag near-duplicate listings in the cleaned data."""
+    df = load_data(input_file)
+    if df is None:
+        sys.exit(1)
+    df = add_image_clusters(df)
+    df.to_csv(input_file, index=False)
+    print(f"Image clusters saved to {input_file}.")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        input_file = sys.argv[1]
+    else:
+        input_file = "soft_toys_cleaned.csv"
+    main(input_file)
@@ -0,0 +1,92 @@
+import pandas as pd
+import os
+import sys
+from utils.cube import DIMENSIONS, MEASURES, AggregateCube
+
+def load_cleaned_data(file_path):
+    """Load the cleaned CSV file."""
+    try:
+        print(f"Loading cleaned data from {file_path}...")
+        df = pd.read_csv(file_path)
+        print(f"Loaded {len(df)} rows.")
+        return df
+    except Exception as e:
+        print(f"Error loading data: {e}")
+        return None
+
+def build_or_update_cube(df, cube_file, update=False):
+    """Rebuild the cube from all rows, or fold the rows not yet in the saved cube into it.
+    Updating from the cumulative cleaned CSV only adds the rows appended since the last run."""
+    if update and os.path.exists(cube_file):
+        try:
+            cube = AggregateCube.load(cube_file)
+        except ValueError as e:
+            print(f"Cannot update: {e}")
+            return None
+        print(f"Updating cube ({len(cube.cells)} cells) from {len(df)} rows...")
+        added = cube.update(df)
+        print(f"Added {added} new rows, skipped {len(df) - added} already in the cube.")
+    else:
+        print(f"Building cube from {len(df)} rows...")
+        cube = AggregateCube.from_rows(df)
+    cube.save(cube_file)
+    print(f"Cube saved to {cube_file} with {len(cube.cells)} cells.")
+    return cube
+
+def sorted_cells(cube):
+    """Cube cells in a canonical order, for comparing two cubes."""
+    cells = cube.cells.astype({measure: float for measure in MEASURES})
+    return cells.sort_values(DIMENSIONS).reset_index(drop=True)
+
+def check_incremental(df):
+    """Check that building the cube from the first half of the rows and then updating it with all rows
+    (twice, as repeated runs on the cumulative CSV would, and once more after a later stage has added a
+    column to the CSV, as part2_image_dedup does) gives the same cube as building from all rows."""
+    full = AggregateCube.from_rows(df)
+    incremental = AggregateCube.from_rows(df.iloc[:len(df) // 2])
+    incremental.update(df)
+    incremental.update(df)
+    incremental.update(df.assign(**{'Image Cluster': range(len(df))}))
+    try:
+        pd.testing.assert_frame_equal(sorted_cells(full), sorted_cells(incremental), check_dtype=False)
+    except AssertionError as e:
+        print(f"❌ Incremental cube differs from a full rebuild:\n{e}")
+        return False
+    print(f"✅ Incremental cube matches a full rebuild ({len(full.cells)} cells, {len(df)} rows).")
+    return True
+
+def cube_insights(cube):
+    """Print the existing report tables and a cross-keyword comparison, all answered from the cube."""
+    print("\nActionable Insights (from aggregate cube):")
+    print("- Top 5 Brands by Frequency:")
+    for _, row in cube.brand_summary().head(5).iterrows():
+        print(f"  {row['Brand']}: {row['Frequency']} products, Avg Rating: {row['Rating']:.2f}")
+
+    print("- Average Price by Rating Range:")
+    for _, row in cube.price_by_rating().iterrows():
+        print(f"  {row['Rating Range']}: INR {row['Price']:.2f}")
+
+    print("- Keyword Comparison:")
+    for _, row in cube.compare_keywords().iterrows():
+        print(f"  {row['Keyword']}: {int(row['Products'])} products, Avg Rating: {row['Avg Rating']:.2f}, "
+              f"Avg Price: INR {row['Avg Price']:.2f}, {int(row['Reviews'])} reviews")
+
+    print("- Products per Price Band:")
+    for _, row in cube.rollup(['Price Band']).iterrows():
+        print(f"  {row['Price Band']}: {int(row['Products'])} products")
+
+def main(input_file="soft_toys_cleaned.csv", cube_file="soft_toys_cube.csv", update=False, check=False):
+    """Main function for the aggregate cube stage."""
+    df = load_cleaned_data(input_file)
+    if df is None:
+        return
+    if check and not check_incremental(df):
+        sys.exit(1)
+    cube = build_or_update_cube(df, cube_file, update=update)
+    if cube is not None:
+        cube_insights(cube)
+
+if __name__ == "__main__":
+    # Usage: python part3_aggregate_cube.py [input_csv] [--update] [--check]
+    args = [arg for arg in sys.argv[1:] if arg not in ("--update", "--check")]
+    main(args[0] if args else "soft_toys_cleaned.csv", update="--update" in sys.argv, check="--check" in sys.argv)
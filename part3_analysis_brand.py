@@ -42,6 +42,14 @@ def brand_performance_analysis(df):
         for _, row in high_rated_low_freq.iterrows():
             print(f"  {row['Brand']}: {row['Frequency']} products, Avg Rating: {row['Rating']:.2f}")
     
+    # Duplicate listings (same photo under several ASINs), if part2_image_dedup.py has run
+    if 'Image Cluster' in df.columns:
+        cluster_sizes = df['Image Cluster'].dropna().value_counts()
+        duplicate_clusters = cluster_sizes[cluster_sizes > 1]
+        if not duplicate_clusters.empty:
+            print(f"- {int(duplicate_clusters.sum())} listings share a photo with another listing "
+                  f"({len(duplicate_clusters)} distinct products listed more than once).")
+    
     # Visualizations
     plot_bar(
         data=brand_analysis,
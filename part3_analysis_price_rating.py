@@ -1,6 +1,14 @@
 import pandas as pd
 from utils.visualization import plot_scatter, plot_bar
 
+# Rating ranges used to group products (shared with other stages that band by rating)
+RATING_BINS = [0, 1, 2, 3, 4, 5]
+RATING_LABELS = ['0-1', '1-2', '2-3', '3-4', '4-5']
+
+# Price buckets (INR) for stages that band by price
+PRICE_BINS = [0, 250, 500, 1000, 2000, float('inf')]
+PRICE_LABELS = ['0-250', '250-500', '500-1000', '1000-2000', '2000+']
+
 def load_cleaned_data(file_path):
     """Load the cleaned CSV file."""
     try:
@@ -22,8 +30,8 @@ def price_vs_rating_analysis(df):
     # Create Rating Range column
     df_filtered.loc[:, 'Rating Range'] = pd.cut(
         df_filtered['Rating'], 
-        bins=[0, 1, 2, 3, 4, 5], 
-        labels=['0-1', '1-2', '2-3', '3-4', '4-5']
+        bins=RATING_BINS, 
+        labels=RATING_LABELS
     )
     
     # Average Price by Rating Range
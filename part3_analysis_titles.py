@@ -0,0 +1,290 @@
+import pandas as pd
+import numpy as np
+import os
+import shutil
+import sys
+import tempfile
+import tracemalloc
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+from utils.visualization import plot_bar
+from part3_analysis_price_rating import RATING_BINS, RATING_LABELS
+
+TOKEN_PATTERN = r"[a-z0-9]+"
+STOP_WORDS = {'a', 'an', 'and', 'for', 'of', 'the', 'to', 'with', 'in', 'on', 'by', 'from', 'pack', 'cm', 'inch'}
+N_FEATURES = 2 ** 18  # Hashing-vectorizer width; no vocabulary has to be fitted
+NUM_PERMUTATIONS = 32  # MinHash signature length
+LSH_BANDS = 8  # 8 bands x 4 rows: titles with Jaccard ~0.6+ usually share a bucket
+LSH_PARTITIONS = 16  # Spill files per band; only one is loaded at a time when pairing candidates
+SIMILARITY_THRESHOLD = 0.7  # Minimum estimated Jaccard similarity for near-duplicate titles
+BATCH_SIZE = 20000
+UNRATED = 'Unrated'
+BUCKET_RECORD = np.dtype([('key', '<u8'), ('doc', '<i8')])
+
+def load_cleaned_data_batches(file_path, batch_size=BATCH_SIZE):
+    """Read the cleaned CSV in batches so millions of titles never sit in memory at once."""
+    try:
+        print(f"Loading cleaned data from {file_path} in batches of {batch_size}...")
+        return pd.read_csv(file_path, chunksize=batch_size)
+    except Exception as e:
+        print(f"Error loading data: {e}")
+        return None
+
+def read_titles(file_path, doc_ids, batch_size=BATCH_SIZE):
+    """Re-read the titles of a few rows (by position in the CSV) instead of keeping every title in memory."""
+    wanted = np.unique(np.asarray(doc_ids, dtype=np.int64))
+    titles = {}
+    offset = 0
+    for chunk in pd.read_csv(file_path, chunksize=batch_size, usecols=['Title']):
+        in_chunk = wanted[(wanted >= offset) & (wanted < offset + len(chunk))]
+        for doc in in_chunk.tolist():
+            title = chunk['Title'].iat[doc - offset]
+            titles[doc] = '' if pd.isna(title) else str(title)
+        offset += len(chunk)
+        if offset > wanted[-1]:
+            break
+    return titles
+
+def tokenize_titles(titles):
+    """Tokenize a batch of titles in bulk. Returns (document positions, tokens) as flat arrays."""
+    # 'Unknown' is the cleaning stage's placeholder for a missing title, not a word in it
+    tokens = titles.fillna('').astype(str).replace('Unknown', '').str.lower().str.findall(TOKEN_PATTERN).explode().dropna()
+    tokens = tokens[(tokens.str.len() > 1) & ~tokens.isin(STOP_WORDS)]
+    return tokens.index.to_numpy(), tokens.to_numpy(dtype=object)
+
+class TitleAnalytics:
+    """Accumulates hashed term counts per brand / rating band and MinHash-LSH title clusters, batch by batch.
+
+    Memory does not grow with the number of titles: term counts are fixed-size arrays (sparse per group),
+    while MinHash signatures and LSH band keys are appended to files in a scratch directory. Candidate
+    pairs are found at the end by sorting one (band, key partition) file at a time and checking them
+    against the memory-mapped signatures. Titles are identified by their row number in the input.
+    """
+
+    def __init__(self, n_features=N_FEATURES, num_permutations=NUM_PERMUTATIONS, bands=LSH_BANDS,
+                 threshold=SIMILARITY_THRESHOLD, partitions=LSH_PARTITIONS, seed=42, work_dir=None):
+        self.n_features = n_features
+        self.num_permutations = num_permutations
+        self.bands = bands
+        self.rows_per_band = num_permutations // bands
+        self.threshold = threshold
+        self.partitions = partitions
+        rng = np.random.default_rng(seed)
+        # Multiply-add hash family over uint64 (odd multipliers), one per permutation
+        self.hash_a = rng.integers(1, 2 ** 63, size=num_permutations, dtype=np.uint64) | np.uint64(1)
+        self.hash_b = rng.integers(0, 2 ** 63, size=num_permutations, dtype=np.uint64)
+        self.band_mix = rng.integers(1, 2 ** 63, size=self.rows_per_band, dtype=np.uint64) | np.uint64(1)
+
+        self.term_totals = np.zeros(n_features, dtype=np.int64)
+        self.feature_names = np.empty(n_features, dtype=object)  # feature -> first token seen
+        self.named = np.zeros(n_features, dtype=bool)
+        self.group_index = {'Brand': {}, 'Rating Band': {}}
+        self.group_terms = {'Brand': None, 'Rating Band': None}
+
+        self.titles_seen = 0
+        self.work_dir = tempfile.mkdtemp(prefix="title_lsh_", dir=work_dir)
+        self.signature_path = os.path.join(self.work_dir, "signatures.u32")
+
+    def bucket_path(self, band, partition):
+        return os.path.join(self.work_dir, f"band{band}-part{partition}.bin")
+
+    def cleanup(self):
+        """Delete the scratch files."""
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def term_matrix(self, positions, features, n_docs):
+        """Sparse document-term count matrix for one batch."""
+        counts = np.ones(len(features), dtype=np.int32)
+        return sparse.csr_matrix((counts, (positions, features)), shape=(n_docs, self.n_features))
+
+    def name_features(self, features, tokens):
+        """Remember a readable token for every feature seen for the first time in this batch."""
+        unique_features, first = np.unique(features, return_index=True)
+        new = ~self.named[unique_features]
+        self.feature_names[unique_features[new]] = tokens[first[new]]
+        self.named[unique_features[new]] = True
+
+    def add_group_counts(self, dimension, labels, matrix):
+        """Add the batch's term counts into the per-group totals (group indicator x term matrix)."""
+        index = self.group_index[dimension]
+        batch_codes, batch_labels = pd.factorize(labels)
+        label_codes = np.array([index.setdefault(label, len(index)) for label in batch_labels], dtype=np.int64)
+        codes = label_codes[batch_codes]
+        indicator = sparse.csr_matrix((np.ones(len(codes)), (codes, np.arange(len(codes)))),
+                                      shape=(len(index), len(codes)))
+        batch_counts = (indicator @ matrix).tocsr()
+        totals = self.group_terms[dimension]
+        if totals is None:
+            self.group_terms[dimension] = batch_counts
+        else:
+            totals.resize((len(index), self.n_features))
+            self.group_terms[dimension] = totals + batch_counts
+
+    def minhash(self, positions, token_hashes):
+        """MinHash signatures for the documents in a batch. Returns (document positions, signatures);
+        titles without any token get no signature."""
+        order = np.lexsort((token_hashes, positions))
+        positions, token_hashes = positions[order], token_hashes[order]
+        starts = np.flatnonzero(np.r_[True, positions[1:] != positions[:-1]]) if len(positions) else np.array([], dtype=int)
+        signatures = np.zeros((len(starts), self.num_permutations), dtype=np.uint32)
+        for column, (a, b) in enumerate(zip(self.hash_a, self.hash_b)):
+            permuted = (token_hashes * a + b) >> np.uint64(32)  # uint64 arithmetic wraps, which is intended
+            signatures[:, column] = np.minimum.reduceat(permuted, starts) if len(starts) else []
+        return positions[starts] if len(starts) else positions, signatures
+
+    def spill(self, positions, signatures, n_docs, offset):
+        """Append a batch's signatures (one row per title, zeros if it has no tokens) and its band keys,
+        split by key into partition files, to the scratch directory."""
+        rows = np.zeros((n_docs, self.num_permutations), dtype=np.uint32)
+        rows[positions] = signatures
+        with open(self.signature_path, 'ab') as f:
+            f.write(rows.tobytes())
+        doc_ids = positions.astype(np.int64) + offset
+        for band in range(self.bands):
+            columns = slice(band * self.rows_per_band, (band + 1) * self.rows_per_band)
+            keys = (signatures[:, columns].astype(np.uint64) * self.band_mix).sum(axis=1)
+            parts = keys % np.uint64(self.partitions)
+            for partition in np.unique(parts).tolist():
+                chosen = parts == partition
+                records = np.empty(int(chosen.sum()), dtype=BUCKET_RECORD)
+                records['key'] = keys[chosen]
+                records['doc'] = doc_ids[chosen]
+                with open(self.bucket_path(band, partition), 'ab') as f:
+                    f.write(records.tobytes())
+
+    def add_batch(self, df):
+        """Fold one batch of cleaned rows into the term counts and the duplicate index."""
+        df = df.reset_index(drop=True)
+        offset = self.titles_seen
+        self.titles_seen += len(df)
+
+        positions, tokens = tokenize_titles(df['Title'])
+        token_hashes = pd.util.hash_array(tokens) if len(tokens) else np.array([], dtype=np.uint64)
+        features = (token_hashes % np.uint64(self.n_features)).astype(np.int64)
+        self.name_features(features, tokens)
+
+        matrix = self.term_matrix(positions, features, len(df))
+        self.term_totals += np.asarray(matrix.sum(axis=0)).ravel()
+        rating_bands = pd.cut(pd.to_numeric(df['Rating'], errors='coerce'), bins=RATING_BINS,
+                              labels=RATING_LABELS).astype(object).fillna(UNRATED)
+        self.add_group_counts('Brand', df['Brand'].fillna('Unknown'), matrix)
+        self.add_group_counts('Rating Band', rating_bands, matrix)
+
+        # Unique tokens per title for MinHash (set semantics)
+        unique = pd.DataFrame({'doc': positions, 'hash': token_hashes}).drop_duplicates()
+        doc_positions, signatures = self.minhash(unique['doc'].to_numpy(np.int64), unique['hash'].to_numpy(np.uint64))
+        self.spill(doc_positions, signatures, len(df), offset)
+
+    def top_terms(self, counts, n=5):
+        """Most frequent (hashed) terms in a count vector, with their readable token."""
+        counts = np.asarray(counts).ravel()
+        top = np.argsort(-counts, kind='stable')[:n]
+        return [(self.feature_names[f] if self.named[f] else f"#{f}", int(counts[f])) for f in top if counts[f] > 0]
+
+    def group_top_terms(self, dimension, n=5):
+        """Top terms for every group of a dimension (Brand or Rating Band)."""
+        totals = self.group_terms[dimension]
+        return {label: self.top_terms(totals.getrow(code).toarray(), n)
+                for label, code in self.group_index[dimension].items()}
+
+    def candidate_pairs(self, band, partition, signatures):
+        """Verified (doc, representative) pairs from one band partition: titles sharing a band key are
+        paired with the first title in that bucket and kept if their signatures agree enough."""
+        path = self.bucket_path(band, partition)
+        if not os.path.exists(path):
+            return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+        records = np.fromfile(path, dtype=BUCKET_RECORD)
+        order = np.argsort(records['key'], kind='stable')
+        keys, docs = records['key'][order], records['doc'][order]
+        first = np.r_[True, keys[1:] != keys[:-1]]
+        reps = docs[np.maximum.accumulate(np.where(first, np.arange(len(docs)), 0))]
+        docs, reps = docs[~first], reps[~first]
+        similar = (signatures[docs] == signatures[reps]).mean(axis=1) >= self.threshold
+        return docs[similar], reps[similar]
+
+    def duplicate_groups(self):
+        """Arrays of row numbers whose titles are near-duplicates (groups of 2+), ordered by first row."""
+        if not self.titles_seen:
+            return []
+        signatures = np.memmap(self.signature_path, dtype=np.uint32, mode='r').reshape(-1, self.num_permutations)
+        pairs = [self.candidate_pairs(band, partition, signatures)
+                 for band in range(self.bands) for partition in range(self.partitions)]
+        docs = np.concatenate([pair[0] for pair in pairs])
+        reps = np.concatenate([pair[1] for pair in pairs])
+        if not len(docs):
+            return []
+        nodes, inverse = np.unique(np.r_[docs, reps], return_inverse=True)
+        graph = sparse.coo_matrix((np.ones(len(docs)), (inverse[:len(docs)], inverse[len(docs):])),
+                                  shape=(len(nodes), len(nodes)))
+        _, labels = connected_components(graph, directed=False)
+        order = np.argsort(labels, kind='stable')
+        groups = np.split(nodes[order], np.flatnonzero(np.diff(labels[order])) + 1)
+        return sorted(groups, key=lambda group: group[0])
+
+def title_analysis(input_file, batch_size=BATCH_SIZE, profile_memory=False):
+    """Analyze title keywords per brand and rating band and find near-duplicate titles."""
+    batches = load_cleaned_data_batches(input_file, batch_size)
+    if batches is None:
+        return None
+    print("\nPerforming Title Text Analysis...")
+    analytics = TitleAnalytics()
+    try:
+        for batch_number, df in enumerate(batches, 1):
+            analytics.add_batch(df)
+            progress = f"Processed batch {batch_number} ({analytics.titles_seen} titles so far)"
+            if profile_memory:
+                progress += f", {tracemalloc.get_traced_memory()[0] / 1e6:.1f} MB held"
+            print(progress)
+
+        # Actionable Insights
+        print("\nActionable Insights:")
+        overall = analytics.top_terms(analytics.term_totals, n=10)
+        print("- Most Common Title Keywords: " + ", ".join(f"{term} ({count})" for term, count in overall))
+
+        brand_terms = analytics.group_top_terms('Brand')
+        brand_sizes = {brand: sum(count for _, count in terms) for brand, terms in brand_terms.items()}
+        print("- Top Keywords for the 5 Wordiest Brands:")
+        for brand in sorted(brand_sizes, key=brand_sizes.get, reverse=True)[:5]:
+            print(f"  {brand}: " + ", ".join(term for term, _ in brand_terms[brand]))
+
+        print("- Top Keywords by Rating Range:")
+        band_terms = analytics.group_top_terms('Rating Band')
+        for band in RATING_LABELS + [UNRATED]:
+            if band in band_terms:
+                print(f"  {band}: " + ", ".join(term for term, _ in band_terms[band]))
+
+        groups = analytics.duplicate_groups()
+        if groups:
+            shown = [group[:3].tolist() for group in groups[:5]]
+            titles = read_titles(input_file, [doc for group in shown for doc in group], batch_size)
+            print(f"- {len(groups)} Groups of Near-Duplicate Titles (same product listed several times?):")
+            for group in shown:
+                print("  " + " | ".join(f"{titles[doc][:40]}..." for doc in group))
+        if profile_memory:
+            print(f"Peak memory held during the analysis: {tracemalloc.get_traced_memory()[1] / 1e6:.1f} MB")
+    finally:
+        analytics.cleanup()
+
+    # Visualizations
+    if overall:
+        plot_bar(
+            data=pd.DataFrame(overall, columns=['Keyword', 'Count']),
+            x='Keyword',
+            y='Count',
+            title='Most Common Keywords in Sponsored Soft Toy Titles',
+            xlabel='Keyword',
+            ylabel='Number of Titles',
+            filename='title_keywords_bar.png'
+        )
+    return analytics
+
+def main(input_file="soft_toys_cleaned.csv", profile_memory=False):
+    """Main function for title text analysis."""
+    if profile_memory:
+        tracemalloc.start()
+    title_analysis(input_file, profile_memory=profile_memory)
+
+if __name__ == "__main__":
+    # Usage: python part3_analysis_titles.py [input_csv] [--profile-memory]
+    args = [arg for arg in sys.argv[1:] if arg != "--profile-memory"]
+    main(args[0] if args else "soft_toys_cleaned.csv", profile_memory="--profile-memory" in sys.argv)
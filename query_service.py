@@ -0,0 +1,305 @@
+import pandas as pd
+import numpy as np
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from part3_analysis_price_rating import RATING_BINS, RATING_LABELS, PRICE_BINS, PRICE_LABELS
+
+TOP_K_COLUMNS = ['Title', 'Brand', 'Price', 'Rating', 'Reviews', 'Product URL']
+SORTABLE_COLUMNS = ['Reviews', 'Rating', 'Price']
+ENDPOINTS = ['/health', '/stats', '/brands/top', '/products/top', '/bands/rating', '/bands/price']
+
+class DatasetUnavailable(Exception):
+    """No dataset has been loaded yet."""
+
+def load_cleaned_data(file_path):
+    """Load the cleaned CSV file."""
+    try:
+        print(f"Loading cleaned data from {file_path}...")
+        df = pd.read_csv(file_path)
+        print(f"Loaded {len(df)} rows.")
+        return df
+    except Exception as e:
+        print(f"Error loading data: {e}")
+        return None
+
+def json_value(value):
+    """Convert numpy scalars and NaN into plain JSON values."""
+    if isinstance(value, (np.integer,)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        return None if np.isnan(value) else round(float(value), 4)
+    return value
+
+class ProductIndex:
+    """In-memory column arrays plus brand / keyword / band / sorted-value indexes over the cleaned data."""
+
+    def __init__(self, df):
+        self.df = df.reset_index(drop=True)
+        self.size = len(self.df)
+        self.price = self.df['Price'].to_numpy(dtype=float)
+        self.rating = self.df['Rating'].to_numpy(dtype=float)
+        self.reviews = self.df['Reviews'].fillna(0).to_numpy(dtype=np.int64)
+
+        # Categorical indexes: value -> row ids
+        self.brand_codes, self.brands = pd.factorize(self.df['Brand'])
+        self.by_brand = self.group_rows(self.brand_codes, self.brands)
+        if 'Keyword' in self.df.columns:
+            self.keyword_codes, self.keywords = pd.factorize(self.df['Keyword'])
+            self.by_keyword = self.group_rows(self.keyword_codes, self.keywords)
+        else:
+            self.keyword_codes, self.keywords, self.by_keyword = None, [], {}
+
+        # Band codes (-1 = missing) using the same ranges as the price/rating analysis
+        self.rating_band = pd.cut(self.rating, bins=RATING_BINS, labels=RATING_LABELS).codes
+        self.price_band = pd.cut(self.price, bins=PRICE_BINS, labels=PRICE_LABELS).codes
+
+        # Sorted-value indexes for numeric range filters (NaNs sort to the end and never match)
+        self.rating_order = np.argsort(self.rating, kind='stable')
+        self.price_order = np.argsort(self.price, kind='stable')
+
+    @staticmethod
+    def group_rows(codes, values):
+        order = np.argsort(codes, kind='stable')
+        boundaries = np.searchsorted(codes[order], np.arange(len(values) + 1))
+        return {value: order[boundaries[i]:boundaries[i + 1]] for i, value in enumerate(values)}
+
+    def range_rows(self, values, order, low, high):
+        """Row ids whose value lies in [low, high], found by binary search on the sorted index."""
+        sorted_values = values[order]
+        start = 0 if low is None else np.searchsorted(sorted_values, low, side='left')
+        stop = np.searchsorted(sorted_values, np.inf if high is None else high, side='right')
+        return order[start:stop]
+
+    def mask(self, params):
+        """Boolean row mask for the filters in a query string."""
+        mask = np.ones(self.size, dtype=bool)
+
+        def keep(rows):
+            selected = np.zeros(self.size, dtype=bool)
+            selected[rows] = True
+            return mask & selected
+
+        if 'brand' in params:
+            mask = keep(self.by_brand.get(params['brand'], np.array([], dtype=int)))
+        if 'keyword' in params:
+            mask = keep(self.by_keyword.get(params['keyword'], np.array([], dtype=int)))
+        if 'rating_band' in params:
+            code = RATING_LABELS.index(params['rating_band']) if params['rating_band'] in RATING_LABELS else -2
+            mask &= self.rating_band == code
+        if 'price_band' in params:
+            code = PRICE_LABELS.index(params['price_band']) if params['price_band'] in PRICE_LABELS else -2
+            mask &= self.price_band == code
+        if 'rating_min' in params or 'rating_max' in params:
+            mask = keep(self.range_rows(self.rating, self.rating_order,
+                                        float_param(params, 'rating_min'), float_param(params, 'rating_max')))
+        if 'price_min' in params or 'price_max' in params:
+            mask = keep(self.range_rows(self.price, self.price_order,
+                                        float_param(params, 'price_min'), float_param(params, 'price_max')))
+        return mask
+
+    def stats(self, params):
+        """Count, average price / rating and total reviews for the filtered rows."""
+        mask = self.mask(params)
+        price = self.price[mask]
+        rating = self.rating[mask]
+        return {
+            'count': int(mask.sum()),
+            'avg_price': json_value(np.nanmean(price)) if np.isfinite(price).any() else None,
+            'min_price': json_value(np.nanmin(price)) if np.isfinite(price).any() else None,
+            'max_price': json_value(np.nanmax(price)) if np.isfinite(price).any() else None,
+            'avg_rating': json_value(np.nanmean(rating)) if np.isfinite(rating).any() else None,
+            'total_reviews': int(self.reviews[mask].sum()),
+        }
+
+    def top_brands(self, params):
+        """Top-k brands by product count (or avg_rating / reviews) within the filtered rows."""
+        mask = self.mask(params) & (self.brand_codes >= 0)
+        k = k_param(params)
+        codes = self.brand_codes[mask]
+        counts = np.bincount(codes, minlength=len(self.brands))
+        rating = self.rating[mask]
+        rated = ~np.isnan(rating)
+        rating_sums = np.bincount(codes[rated], weights=rating[rated], minlength=len(self.brands))
+        rating_counts = np.bincount(codes[rated], minlength=len(self.brands))
+        review_sums = np.bincount(codes, weights=self.reviews[mask], minlength=len(self.brands))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            avg_rating = rating_sums / rating_counts
+
+        metric = {'count': counts, 'avg_rating': np.where(counts > 0, avg_rating, np.nan),
+                  'reviews': review_sums}.get(params.get('by', 'count'))
+        if metric is None:
+            raise ValueError("'by' must be one of count, avg_rating, reviews")
+        # Brands without a rating sort last, after every rated brand
+        order = np.argsort(np.where(np.isnan(metric), np.inf, -metric), kind='stable')
+        order = [code for code in order if counts[code] > 0][:k]
+        return [{'brand': self.brands[code], 'count': int(counts[code]),
+                 'avg_rating': json_value(avg_rating[code]), 'total_reviews': int(review_sums[code])}
+                for code in order]
+
+    def top_products(self, params):
+        """Top-k products by Reviews, Rating or Price within the filtered rows."""
+        by = params.get('by', 'Reviews')
+        if by not in SORTABLE_COLUMNS:
+            raise ValueError(f"'by' must be one of {', '.join(SORTABLE_COLUMNS)}")
+        k = k_param(params)
+        rows = np.flatnonzero(self.mask(params))
+        values = {'Reviews': self.reviews, 'Rating': self.rating, 'Price': self.price}[by][rows].astype(float)
+        keep = ~np.isnan(values)
+        rows, values = rows[keep], values[keep]
+        if params.get('order', 'desc') == 'desc':
+            values = -values
+        if len(rows) > k:
+            partition = np.argpartition(values, k)[:k]
+            rows, values = rows[partition], values[partition]
+        rows = rows[np.argsort(values, kind='stable')]
+        records = self.df.loc[rows, [c for c in TOP_K_COLUMNS if c in self.df.columns]].to_dict('records')
+        return [{key: json_value(value) for key, value in record.items()} for record in records]
+
+    def bands(self, params, band):
+        """Count and average price per rating range or price bucket within the filtered rows."""
+        mask = self.mask(params)
+        codes, labels = (self.rating_band, RATING_LABELS) if band == 'rating' else (self.price_band, PRICE_LABELS)
+        result = []
+        for code, label in enumerate(labels):
+            in_band = mask & (codes == code)
+            price = self.price[in_band]
+            priced = price[~np.isnan(price)]
+            result.append({'band': label, 'count': int(in_band.sum()),
+                           'avg_price': json_value(priced.mean()) if len(priced) else None})
+        return result
+
+def float_param(params, name):
+    return float(params[name]) if name in params else None
+
+def k_param(params, default=5):
+    k = int(params.get('k', default))
+    if k < 1:
+        raise ValueError("'k' must be at least 1")
+    return k
+
+class QueryService:
+    """Holds the current ProductIndex and rebuilds it when the cleaned CSV changes on disk."""
+
+    def __init__(self, data_file, poll_interval=2.0):
+        self.data_file = data_file
+        self.poll_interval = poll_interval
+        self.index = None
+        self.loaded_mtime = None
+        self.failed_mtime = None  # Version of the file that could not be indexed; retried once it changes
+        self.reload()
+
+    def reload(self):
+        """Load the CSV and swap in a freshly built index. Keeps the old index if loading fails."""
+        try:
+            mtime = os.path.getmtime(self.data_file)
+        except OSError:
+            print(f"Error: {self.data_file} not found.")
+            return False
+        df = load_cleaned_data(self.data_file)
+        if df is None:
+            self.failed_mtime = mtime
+            return False
+        start = time.perf_counter()
+        try:
+            index = ProductIndex(df)
+        except Exception as e:
+            # E.g. a file read while it was still being written; the next write changes its mtime
+            print(f"Error building indexes from {self.data_file} ({e!r}); keeping the previous index.")
+            self.failed_mtime = mtime
+            return False
+        self.index = index
+        self.loaded_mtime = mtime
+        print(f"Built indexes for {self.index.size} rows in {(time.perf_counter() - start) * 1000:.1f} ms.")
+        return True
+
+    def watch(self):
+        """Poll the data file and hot-reload when it is replaced."""
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                mtime = os.path.getmtime(self.data_file)
+            except OSError:
+                continue
+            if mtime != self.loaded_mtime and mtime != self.failed_mtime:
+                print(f"Detected a new {self.data_file}, reloading...")
+                self.reload()
+
+    def handle(self, path, params):
+        """Route a request path to an index query."""
+        index = self.index  # Snapshot, so a concurrent reload never mixes two datasets
+        if index is None:
+            raise DatasetUnavailable("No dataset loaded")
+        if path == '/health':
+            return {'status': 'ok', 'rows': index.size, 'data_file': self.data_file}
+        if path == '/stats':
+            return index.stats(params)
+        if path == '/brands/top':
+            return index.top_brands(params)
+        if path == '/products/top':
+            return index.top_products(params)
+        if path == '/bands/rating':
+            return index.bands(params, 'rating')
+        if path == '/bands/price':
+            return index.bands(params, 'price')
+        raise ValueError(f"Unknown endpoint {path}")
+
+def make_handler(service):
+    """Build a request handler class bound to a QueryService."""
+
+    class QueryHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            start = time.perf_counter()
+            if url.path not in ENDPOINTS:
+                body, status = {'error': f"Unknown endpoint {url.path}"}, 404
+            else:
+                try:
+                    body, status = {'result': service.handle(url.path, params)}, 200
+                except DatasetUnavailable as e:
+                    body, status = {'error': str(e)}, 503
+                except ValueError as e:
+                    body, status = {'error': str(e)}, 400
+                except Exception as e:
+                    print(f"Error handling {self.path}: {e!r}")
+                    body, status = {'error': "Internal server error"}, 500
+            body['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 3)
+            payload = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass  # Keep the console for load/reload messages
+
+    return QueryHandler
+
+def main(data_file="soft_toys_cleaned.csv", port=8050):
+    """Serve aggregate queries over the cleaned dataset on localhost."""
+    service = QueryService(data_file)
+    if service.index is None:
+        sys.exit(1)
+    threading.Thread(target=service.watch, daemon=True).start()
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(service))
+    print(f"Query service listening on http://127.0.0.1:{port}")
+    print("Endpoints: /health, /stats, /brands/top, /products/top, /bands/rating, /bands/price")
+    print("Filters: brand, keyword, rating_band, price_band, rating_min/max, price_min/max (plus k, by, order)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down query service.")
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        main(sys.argv[1])
+    else:
+        main()
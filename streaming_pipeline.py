@@ -0,0 +1,298 @@
+import argparse
+import heapq
+import os
+import queue
+import threading
+import time
+import numpy as np
+import pandas as pd
+import amazon_soft_toys_scraper as scraper
+from part2_cleaning import clean_data, normalize_columns
+from part3_analysis_price_rating import RATING_BINS, RATING_LABELS
+from utils.crawl import CrawlFrontier
+from utils.cube import AggregateCube
+from utils.page_archive import PageArchive
+from utils.records import ProductBatch
+from utils.visualization import plot_bar
+
+QUEUE_PAGES = 8  # Result pages buffered between scraper and cleaner before the scraper blocks
+REPLAY_PAGE_SIZE = 48  # Rows per simulated results page when replaying a CSV
+REFRESH_SECONDS = 10
+TOP_K = 5
+END_OF_STREAM = None
+
+class QueueSink:
+    """Takes the place of the ProductBatch that crawl() extends: every finished page goes onto a bounded queue.
+
+    put() blocks while the queue is full, so a slow cleaner slows the crawl down instead of growing memory.
+    """
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.records = 0
+        self.blocked_seconds = 0.0
+
+    def __len__(self):
+        return self.records
+
+    def extend(self, records):
+        batch = ProductBatch()
+        batch.extend(records)
+        if batch:
+            self.put(batch.to_dataframe())
+
+    def put(self, df):
+        """Queue one page of raw rows, waiting for room if the cleaner is behind."""
+        start = time.perf_counter()
+        self.pages.put(df)
+        self.blocked_seconds += time.perf_counter() - start
+        self.records += len(df)
+
+class TopK:
+    """The k largest values of a column seen so far, kept in a min-heap (ties keep the earlier row)."""
+
+    def __init__(self, column, k=TOP_K):
+        self.column = column
+        self.k = k
+        self.heap = []
+        self.seen = 0
+
+    def add(self, df):
+        # Only a page's own top k can enter the overall top k
+        candidates = df.dropna(subset=[self.column]).nlargest(self.k, self.column, keep='first')
+        for title, value in zip(candidates['Title'], candidates[self.column]):
+            self.seen += 1
+            item = (value, -self.seen, title)
+            if len(self.heap) < self.k:
+                heapq.heappush(self.heap, item)
+            elif item > self.heap[0]:
+                heapq.heapreplace(self.heap, item)
+
+    def to_dataframe(self):
+        rows = [(title, value) for value, _, title in sorted(self.heap, reverse=True)]
+        return pd.DataFrame(rows, columns=['Title', self.column])
+
+class LiveAggregates:
+    """Brand counts, rating bands and top-k products, updated one cleaned page at a time."""
+
+    def __init__(self, k=TOP_K):
+        self.cube = AggregateCube()
+        self.top_reviews = TopK('Reviews', k)
+        self.top_ratings = TopK('Rating', k)
+        self.rows = 0
+
+    def update(self, df):
+        if df.empty:
+            return
+        # clean_page has already dropped repeated Product URLs, so the page's cells are simply added
+        self.cube.merge_cells(AggregateCube.aggregate_rows(df))
+        self.top_reviews.add(df)
+        self.top_ratings.add(df)
+        self.rows += len(df)
+
+    def report(self, charts=True):
+        """Print the current insights and redraw the charts (same files as the batch scripts)."""
+        if not self.rows:
+            print("No cleaned rows yet.")
+            return
+        brands = self.cube.brand_summary()
+        price_by_rating = self.cube.price_by_rating()
+        top_reviews = self.top_reviews.to_dataframe()
+        top_ratings = self.top_ratings.to_dataframe()
+
+        print(f"\nLive Insights ({self.rows} products so far):")
+        print("- Top 5 Brands by Frequency:")
+        for _, row in brands.head(5).iterrows():
+            print(f"  {row['Brand']}: {row['Frequency']} products, Avg Rating: {row['Rating']:.2f}")
+        print("- Average Price by Rating Range:")
+        for _, row in price_by_rating.iterrows():
+            print(f"  {row['Rating Range']}: INR {row['Price']:.2f}")
+        print("- Top 5 Products by Reviews:")
+        for _, row in top_reviews.iterrows():
+            print(f"  {row['Title'][:40]}...: {row['Reviews']} reviews")
+        print("- Top 5 Products by Rating:")
+        for _, row in top_ratings.iterrows():
+            print(f"  {row['Title'][:40]}...: {row['Rating']:.1f}")
+
+        if not charts:
+            return
+        plot_bar(data=brands, x='Brand', y='Frequency', title='Top 5 Brands by Frequency', xlabel='Brand',
+                 ylabel='Number of Sponsored Products', filename='brand_frequency_bar.png', top_n=5)
+        if not price_by_rating.empty:
+            plot_bar(data=price_by_rating, x='Rating Range', y='Price', title='Average Price by Rating Range',
+                     xlabel='Rating Range', ylabel='Average Price (INR)', filename='price_by_rating_bar.png')
+        if not top_reviews.empty:
+            plot_bar(data=top_reviews, x='Title', y='Reviews', title='Top 5 Most-Reviewed Sponsored Soft Toys',
+                     xlabel='Product Title', ylabel='Number of Reviews', filename='most_reviewed_products_bar.png')
+
+class StreamingPipeline:
+    """Scraper -> bounded queue -> cleaner -> live aggregates, all running while the crawl is in progress.
+
+    The producer runs in a background thread; cleaning, aggregation and chart refreshes happen on the
+    calling thread (matplotlib is not thread-safe). Pages are cleaned in arrival order with the same
+    normalize_columns as part2_cleaning.py and deduplicated on Product URL across pages, so the final
+    numbers match running the batch scripts on the same raw rows.
+    """
+
+    def __init__(self, cleaned_file="soft_toys_cleaned.csv", raw_file=None, queue_pages=QUEUE_PAGES,
+                 refresh_seconds=REFRESH_SECONDS, charts=True):
+        self.cleaned_file = cleaned_file
+        self.raw_file = raw_file
+        self.refresh_seconds = refresh_seconds
+        self.charts = charts
+        self.pages = queue.Queue(maxsize=queue_pages)
+        self.sink = QueueSink(self.pages)
+        self.aggregates = LiveAggregates()
+        self.seen_urls = set()
+        self.duplicates = 0
+        self.max_queue_depth = 0
+
+    def append_csv(self, df, path):
+        df.to_csv(path, mode='a', header=not os.path.exists(path), index=False)
+
+    def clean_page(self, df):
+        """Save the raw page, drop rows already seen, normalize and fold into the aggregates."""
+        if self.raw_file:
+            self.append_csv(df, self.raw_file)
+        # fillna: rows without a URL all count as one product, as drop_duplicates does in batch mode
+        urls = df['Product URL'].fillna('')
+        fresh = ~urls.map(self.seen_urls.__contains__).astype(bool) & ~urls.duplicated()
+        self.seen_urls.update(urls[fresh])
+        self.duplicates += int((~fresh).sum())
+        cleaned = normalize_columns(df[fresh].copy())
+        self.append_csv(cleaned, self.cleaned_file)
+        self.aggregates.update(cleaned)
+
+    def consume(self):
+        last_refresh = time.time()
+        while True:
+            self.max_queue_depth = max(self.max_queue_depth, self.pages.qsize())
+            df = self.pages.get()
+            if df is END_OF_STREAM:
+                break
+            self.clean_page(df)
+            if time.time() - last_refresh >= self.refresh_seconds:
+                self.aggregates.report(self.charts)
+                last_refresh = time.time()
+
+    def run(self, produce):
+        """Run produce(sink) in a producer thread and clean/aggregate its pages until it finishes."""
+        for path in (self.cleaned_file, self.raw_file):
+            if path and os.path.exists(path):
+                os.remove(path)
+
+        def producer():
+            try:
+                produce(self.sink)
+            except Exception as e:
+                print(f"Error in producer: {e}")
+            finally:
+                self.pages.put(END_OF_STREAM)
+
+        start = time.perf_counter()
+        thread = threading.Thread(target=producer, daemon=True)
+        thread.start()
+        self.consume()
+        thread.join()
+        elapsed = time.perf_counter() - start
+
+        self.aggregates.report(self.charts)
+        print(f"\n✅ Streamed {len(self.sink)} rows in {elapsed:.1f}s: {self.aggregates.rows} cleaned, "
+              f"{self.duplicates} duplicates dropped. Cleaned data saved to '{self.cleaned_file}'.")
+        print(f"Backpressure: queue peaked at {self.max_queue_depth}/{self.pages.maxsize} pages, "
+              f"producer blocked for {self.sink.blocked_seconds:.1f}s.")
+        return self.aggregates
+
+def crawl_source(search_terms, max_pages=2, frontier_file="stream_frontier.json", archive_dir="page_archive"):
+    """Producer that runs the scraper's crawl loop with the queue sink in place of a ProductBatch.
+    A streaming crawl always starts from page 1 (the aggregates are not persisted between runs).
+    Fetched pages go into the raw-page archive as in a batch crawl (archive_dir=None turns this off)."""
+    def produce(sink):
+        frontier = CrawlFrontier(frontier_file)
+        frontier.clear()
+        for search_term in search_terms:
+            frontier.add(search_term, 1)
+        archive = PageArchive(archive_dir) if archive_dir else None
+        if archive:
+            print(f"Archiving page sources to '{archive_dir}' as run {archive.run}")
+        driver = scraper.connect_driver()
+        try:
+            scraper.crawl(driver, frontier, sink, max_pages=max_pages, archive=archive)
+        finally:
+            scraper.release_driver(driver)
+            if archive:
+                archive.close()
+    return produce
+
+def replay_source(raw_file, page_size=REPLAY_PAGE_SIZE, delay=0.0):
+    """Producer that replays a saved raw CSV as a sequence of results pages (for testing without a browser)."""
+    def produce(sink):
+        for page in pd.read_csv(raw_file, chunksize=page_size):
+            sink.put(page)
+            if delay:
+                time.sleep(delay)
+    return produce
+
+def verify_against_batch(raw_file, aggregates):
+    """Run the batch cleaning and analysis calculations on the raw file and compare with the live aggregates."""
+    print(f"\nVerifying streamed results against the batch pipeline on {raw_file}...")
+    batch = clean_data(pd.read_csv(raw_file))
+
+    brands = aggregates.cube.brand_summary().set_index('Brand')
+    batch_counts = batch['Brand'].value_counts()
+    batch_ratings = batch.groupby('Brand')['Rating'].mean()
+
+    rated = batch.dropna(subset=['Price', 'Rating']).copy()
+    rated['Rating Range'] = pd.cut(rated['Rating'], bins=RATING_BINS, labels=RATING_LABELS)
+    batch_price = rated.groupby('Rating Range', observed=True)['Price'].mean()
+    live_price = aggregates.cube.price_by_rating().set_index('Rating Range')['Price']
+    live_price.index = live_price.index.astype(str)
+
+    def same_values(live, expected):
+        return (set(live.index) == set(expected.index)
+                and np.allclose(live.to_numpy(float), expected.reindex(live.index).to_numpy(float), equal_nan=True))
+
+    checks = [
+        ('Row count', aggregates.rows == len(batch)),
+        ('Brand frequencies', brands['Frequency'].to_dict() == batch_counts.to_dict()),
+        ('Average rating by brand', same_values(brands['Rating'], batch_ratings)),
+        ('Average price by rating range', same_values(live_price, batch_price.rename(index=str))),
+        ('Top reviews', aggregates.top_reviews.to_dataframe()['Reviews'].tolist()
+                        == batch['Reviews'].nlargest(TOP_K).tolist()),
+        ('Top ratings', aggregates.top_ratings.to_dataframe()['Rating'].tolist()
+                        == batch['Rating'].dropna().nlargest(TOP_K).tolist()),
+    ]
+    for name, ok in checks:
+        print(f"{'✓' if ok else '✗'} {name}")
+    return all(ok for _, ok in checks)
+
+def main():
+    """Command-line entry point: stream a live crawl, or replay a saved raw CSV, into live aggregates."""
+    parser = argparse.ArgumentParser(description="Stream scraped products through cleaning into live aggregates")
+    parser.add_argument("keywords", nargs="*", default=["soft toys"], help="Search terms to crawl")
+    parser.add_argument("--max-pages", type=int, default=2)
+    parser.add_argument("--replay", metavar="RAW_CSV", help="Replay a saved raw CSV instead of crawling")
+    parser.add_argument("--replay-delay", type=float, default=0.0, help="Seconds between replayed pages")
+    parser.add_argument("--queue-pages", type=int, default=QUEUE_PAGES, help="Pages buffered before the scraper blocks")
+    parser.add_argument("--refresh", type=float, default=REFRESH_SECONDS, help="Seconds between live insight/chart refreshes")
+    parser.add_argument("--output", default="soft_toys_cleaned.csv")
+    parser.add_argument("--verify", action="store_true", help="Compare the final numbers with the batch pipeline")
+    parser.add_argument("--archive-dir", default="page_archive", help="Compressed raw-page archive")
+    args = parser.parse_args()
+
+    if args.replay:
+        raw_file = args.replay
+        pipeline = StreamingPipeline(args.output, queue_pages=args.queue_pages, refresh_seconds=args.refresh)
+        produce = replay_source(raw_file, delay=args.replay_delay)
+    else:
+        raw_file = f"{args.keywords[0].replace(' ', '_')}_sponsored.csv"
+        pipeline = StreamingPipeline(args.output, raw_file=raw_file, queue_pages=args.queue_pages,
+                                     refresh_seconds=args.refresh)
+        produce = crawl_source(args.keywords, max_pages=args.max_pages, archive_dir=args.archive_dir)
+
+    aggregates = pipeline.run(produce)
+    if args.verify and os.path.exists(raw_file):
+        verify_against_batch(raw_file, aggregates)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+import heapq
+import itertools
+import json
+import os
+import random
+import time
+
+PAGE_RESULTS = "results"
+PAGE_CAPTCHA = "captcha"
+PAGE_EMPTY = "empty"
+PAGE_ERROR = "error"
+
+RESULT_MARKERS = ('data-component-type="s-search-result"', "data-component-type='s-search-result'")
+CAPTCHA_MARKERS = (
+    "/errors/validatecaptcha",
+    "enter the characters you see below",
+    "type the characters you see in this image",
+    "api-services-support@amazon.com",
+)
+EMPTY_MARKERS = ("no results for", "did not match any products")
+
+def classify_page_state(html):
+    """Classify a fetched page as results / captcha / empty / error using plain substring checks."""
+    if not html:
+        return PAGE_ERROR
+    if any(marker in html for marker in RESULT_MARKERS):
+        return PAGE_RESULTS
+    lowered = html.lower()
+    if any(marker in lowered for marker in CAPTCHA_MARKERS):
+        return PAGE_CAPTCHA
+    if any(marker in lowered for marker in EMPTY_MARKERS):
+        return PAGE_EMPTY
+    return PAGE_ERROR
+
+class TokenBucket:
+    """Token-bucket rate limiter whose refill rate adapts to success, error and block signals."""
+
+    def __init__(self, rate=0.5, capacity=2, min_rate=0.02, max_rate=2.0, increase=0.05):
+        self.rate = rate  # tokens (requests) per second
+        self.capacity = capacity
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """Block until a token is available and take it. Returns the seconds spent waiting."""
+        waited = 0.0
+        self._refill()
+        while self.tokens < 1:
+            delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+            self._refill()
+        self.tokens -= 1
+        return waited
+
+    def record_success(self):
+        """Additive increase after a clean page."""
+        self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def record_error(self):
+        """Moderate slowdown after a failed or unrecognised page."""
+        self.rate = max(self.min_rate, self.rate * 0.75)
+
+    def record_block(self):
+        """Halve the rate and drain the bucket after a captcha / robot check."""
+        self.rate = max(self.min_rate, self.rate * 0.5)
+        self.tokens = 0
+
+class HostRateLimiter:
+    """One adaptive token bucket per host."""
+
+    def __init__(self, **bucket_options):
+        self.bucket_options = bucket_options
+        self.buckets = {}
+
+    def bucket(self, host):
+        """Return the bucket for a host, creating it on first use."""
+        if host not in self.buckets:
+            self.buckets[host] = TokenBucket(**self.bucket_options)
+        return self.buckets[host]
+
+class CrawlFrontier:
+    """Priority queue of (keyword, page) crawl tasks persisted to a JSON file between runs."""
+
+    def __init__(self, path="crawl_frontier.json", max_attempts=4, base_backoff=30, max_backoff=900):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.heap = []
+        self.done = set()
+        self.failed = []
+        self.in_flight = {}
+        self.counter = itertools.count()
+        self.load()
+
+    @staticmethod
+    def task_key(task):
+        return f"{task['keyword']}|{task['page']}"
+
+    def load(self):
+        """Restore pending, completed and failed tasks. In-flight tasks from a crashed run are requeued."""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Could not read crawl frontier {self.path}: {e}")
+            return
+        self.done = set(state.get('done', []))
+        self.failed = state.get('failed', [])
+        for task in state.get('pending', []) + state.get('in_flight', []):
+            self._push(task)
+        print(f"Loaded crawl frontier: {len(self.heap)} pending, {len(self.done)} done, {len(self.failed)} failed.")
+
+    def save(self):
+        """Write the frontier atomically so an interrupted crawl can resume."""
+        state = {
+            'pending': [entry[3] for entry in self.heap],
+            'in_flight': list(self.in_flight.values()),
+            'done': sorted(self.done),
+            'failed': self.failed,
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def _push(self, task):
+        heapq.heappush(self.heap, (task.get('ready_at', 0), task['priority'], next(self.counter), task))
+
+    def has_pending(self):
+        return bool(self.heap)
+
+    def clear(self):
+        """Forget every task, e.g. when starting a fresh crawl after a finished one."""
+        self.heap = []
+        self.done = set()
+        self.failed = []
+        self.in_flight = {}
+        self.save()
+
+    def add(self, keyword, page=1, priority=None):
+        """Queue a task unless it is already queued, running or done. Earlier pages run first by default."""
+        task = {'keyword': keyword, 'page': page, 'priority': page if priority is None else priority,
+                'attempts': 0, 'ready_at': 0}
+        key = self.task_key(task)
+        queued = {self.task_key(entry[3]) for entry in self.heap} | set(self.in_flight)
+        if key in self.done or key in queued:
+            return False
+        self._push(task)
+        self.save()
+        return True
+
+    def pop(self):
+        """Return the next ready task, sleeping until one becomes ready. Returns None when the frontier is empty."""
+        if not self.heap:
+            return None
+        ready_at, _, _, task = heapq.heappop(self.heap)
+        delay = ready_at - time.time()
+        if delay > 0:
+            print(f"Next task ({task['keyword']!r} page {task['page']}) is backing off, waiting {delay:.0f}s...")
+            time.sleep(delay)
+        self.in_flight[self.task_key(task)] = task
+        self.save()
+        return task
+
+    def complete(self, task):
+        """Mark a task as finished."""
+        key = self.task_key(task)
+        self.in_flight.pop(key, None)
+        self.done.add(key)
+        self.save()
+
+    def requeue(self, task, reason):
+        """Put a task back with exponential backoff, or give up after max_attempts."""
+        key = self.task_key(task)
+        self.in_flight.pop(key, None)
+        task['attempts'] += 1
+        task['last_error'] = reason
+        if task['attempts'] >= self.max_attempts:
+            print(f"Giving up on {task['keyword']!r} page {task['page']} after {task['attempts']} attempts ({reason}).")
+            self.failed.append(task)
+        else:
+            backoff = min(self.max_backoff, self.base_backoff * 2 ** (task['attempts'] - 1))
+            task['ready_at'] = time.time() + backoff * random.uniform(0.8, 1.2)
+            print(f"Requeued {task['keyword']!r} page {task['page']} ({reason}), retry in ~{backoff:.0f}s.")
+            self._push(task)
+        self.save()
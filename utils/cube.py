@@ -0,0 +1,152 @@
+import numpy as np
+import os
+import pandas as pd
+from part3_analysis_price_rating import RATING_BINS, RATING_LABELS, PRICE_BINS, PRICE_LABELS
+
+DIMENSIONS = ['Keyword', 'Brand', 'Rating Range', 'Price Band']
+MEASURES = ['Products', 'Rated', 'Rating Sum', 'Priced', 'Price Sum', 'Reviews']
+UNRATED = 'Unrated'
+UNPRICED = 'Unpriced'
+DEFAULT_KEYWORD = 'soft toys'
+
+def band_order(dimension):
+    """Display order of the band labels for a dimension (None for free-text dimensions)."""
+    if dimension == 'Rating Range':
+        return RATING_LABELS + [UNRATED]
+    if dimension == 'Price Band':
+        return PRICE_LABELS + [UNPRICED]
+    return None
+
+class AggregateCube:
+    """Pre-aggregated counts and sums by keyword x brand x rating range x price band.
+
+    Only sums and counts are stored, so cells from different batches add up and
+    averages are derived at query time (e.g. Avg Rating = Rating Sum / Rated).
+    The keys of the rows already folded in are kept too, so update() only adds rows
+    it has not seen and re-running it on the cumulative CSV does not double-count.
+    """
+
+    def __init__(self, cells=None, row_keys=None):
+        self.cells = cells if cells is not None else pd.DataFrame(columns=DIMENSIONS + MEASURES)
+        self.row_keys = row_keys if row_keys is not None else np.array([], dtype=np.uint64)
+
+    @staticmethod
+    def keys_for_rows(df, keyword=DEFAULT_KEYWORD):
+        """One key per cleaned row: a hash of its identity (Product URL and Keyword) plus its occurrence
+        number, so a product scraped twice stays two rows, as in a full rebuild. Other columns are left
+        out, so a stage that adds or rewrites columns (e.g. Image Cluster) does not make old rows look new."""
+        identity = pd.DataFrame({
+            'Product URL': df['Product URL'].astype(object).where(df['Product URL'].notna(), ''),
+            'Keyword': df['Keyword'].fillna(keyword) if 'Keyword' in df.columns else keyword,
+        }, index=df.index)
+        contents = pd.util.hash_pandas_object(identity, index=False).to_numpy()
+        occurrence = pd.Series(contents).groupby(contents).cumcount().to_numpy()
+        return pd.util.hash_pandas_object(pd.DataFrame({'Row': contents, 'Occurrence': occurrence}),
+                                          index=False).to_numpy()
+
+    @staticmethod
+    def keys_path(path):
+        """Sidecar file holding the keys of the rows folded into the cube saved at path."""
+        return os.path.splitext(path)[0] + "_rows.npy"
+
+    @staticmethod
+    def aggregate_rows(df, keyword=DEFAULT_KEYWORD):
+        """Collapse cleaned product rows into cube cells."""
+        rating = pd.to_numeric(df['Rating'], errors='coerce')
+        price = pd.to_numeric(df['Price'], errors='coerce')
+        rows = pd.DataFrame({
+            'Keyword': df['Keyword'].fillna(keyword) if 'Keyword' in df.columns else keyword,
+            'Brand': df['Brand'].fillna('Unknown'),
+            # Same rating ranges as price_vs_rating_analysis
+            'Rating Range': pd.cut(rating, bins=RATING_BINS, labels=RATING_LABELS).astype(object).fillna(UNRATED),
+            'Price Band': pd.cut(price, bins=PRICE_BINS, labels=PRICE_LABELS).astype(object).fillna(UNPRICED),
+            'Products': 1,
+            'Rated': rating.notna().astype(int),
+            'Rating Sum': rating.fillna(0),
+            'Priced': price.notna().astype(int),
+            'Price Sum': price.fillna(0),
+            'Reviews': pd.to_numeric(df['Reviews'], errors='coerce').fillna(0).astype(int),
+        }, index=df.index)
+        return rows.groupby(DIMENSIONS, as_index=False, sort=False)[MEASURES].sum()
+
+    @classmethod
+    def from_rows(cls, df, keyword=DEFAULT_KEYWORD):
+        """Build a cube from cleaned product rows."""
+        return cls(cls.aggregate_rows(df, keyword), np.unique(cls.keys_for_rows(df, keyword)))
+
+    def update(self, df, keyword=DEFAULT_KEYWORD):
+        """Fold the rows of df that are not already in the cube into it. Returns the number of rows added."""
+        keys = self.keys_for_rows(df, keyword)
+        new = ~np.isin(keys, self.row_keys)
+        if new.any():
+            self.merge_cells(self.aggregate_rows(df[new], keyword))
+            self.row_keys = np.union1d(self.row_keys, keys[new])
+        return int(new.sum())
+
+    def merge_cells(self, cells):
+        """Add pre-aggregated cells (e.g. another cube's) into this one."""
+        if self.cells.empty:
+            self.cells = cells.reset_index(drop=True)
+            return
+        combined = pd.concat([self.cells, cells], ignore_index=True)
+        self.cells = combined.groupby(DIMENSIONS, as_index=False, sort=False)[MEASURES].sum()
+
+    def slice(self, **where):
+        """Return a sub-cube. Keyword arguments use dimension names with '_' for spaces, e.g.
+        slice(keyword='soft toys', rating_range=['3-4', '4-5']). Values may be a single value or a list."""
+        cells = self.cells
+        for name, value in where.items():
+            dimension = name.replace('_', ' ').title()
+            if dimension not in DIMENSIONS:
+                raise ValueError(f"Unknown dimension '{name}'")
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            cells = cells[cells[dimension].isin(values)]
+        return AggregateCube(cells.reset_index(drop=True))
+
+    def rollup(self, dimensions=()):
+        """Sum the measures over every dimension not listed, adding derived averages."""
+        dimensions = list(dimensions)
+        if dimensions:
+            result = self.cells.groupby(dimensions, as_index=False, sort=False)[MEASURES].sum()
+        else:
+            result = self.cells[MEASURES].sum().to_frame().T
+        result[MEASURES] = result[MEASURES].astype(float)
+        result['Avg Rating'] = result['Rating Sum'] / result['Rated'].where(result['Rated'] > 0)
+        result['Avg Price'] = result['Price Sum'] / result['Priced'].where(result['Priced'] > 0)
+        for dimension in dimensions:
+            order = band_order(dimension)
+            if order is not None:
+                result[dimension] = pd.Categorical(result[dimension], categories=order, ordered=True)
+        return result.sort_values(dimensions).reset_index(drop=True) if dimensions else result
+
+    def brand_summary(self, keyword=None):
+        """Brand / Frequency / Rating table as in brand_performance_analysis."""
+        cube = self.slice(keyword=keyword) if keyword else self
+        brands = cube.rollup(['Brand'])
+        brands = brands.rename(columns={'Products': 'Frequency', 'Avg Rating': 'Rating'})
+        brands['Frequency'] = brands['Frequency'].astype(int)
+        return brands[['Brand', 'Frequency', 'Rating']].sort_values('Frequency', ascending=False, kind='stable')
+
+    def price_by_rating(self, keyword=None):
+        """Average price per rating range as in price_vs_rating_analysis."""
+        cube = self.slice(keyword=keyword) if keyword else self
+        bands = cube.slice(rating_range=RATING_LABELS).rollup(['Rating Range'])
+        bands = bands[bands['Priced'] > 0].rename(columns={'Avg Price': 'Price'})
+        return bands[['Rating Range', 'Price']].reset_index(drop=True)
+
+    def compare_keywords(self, dimension=None):
+        """Per-keyword totals and averages, optionally broken down by a second dimension."""
+        dimensions = ['Keyword'] + ([dimension] if dimension else [])
+        return self.rollup(dimensions)[dimensions + ['Products', 'Avg Rating', 'Avg Price', 'Reviews']]
+
+    def save(self, path):
+        self.cells.to_csv(path, index=False)
+        np.save(self.keys_path(path), self.row_keys)
+
+    @classmethod
+    def load(cls, path):
+        cells = pd.read_csv(path, dtype={'Keyword': str, 'Brand': str, 'Rating Range': str, 'Price Band': str})
+        keys_path = cls.keys_path(path)
+        if not os.path.exists(keys_path):
+            raise ValueError(f"{keys_path} is missing, so the rows already in {path} are unknown; rebuild the cube")
+        return cls(cells, np.load(keys_path))
@@ -0,0 +1,75 @@
+def hamming_distance(a, b):
+    """Count the differing bits between two integer hashes."""
+    return bin(a ^ b).count("1")
+
+class UnionFind:
+    """Disjoint-set forest used to merge near-duplicate items into clusters."""
+
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, item):
+        """Return the root of an item, compressing the path on the way."""
+        root = item
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[item] != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, a, b):
+        """Merge the sets containing a and b."""
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    def labels(self):
+        """Return dense cluster labels (0..k-1) in order of first appearance."""
+        labels = []
+        dense = {}
+        for item in range(len(self.parent)):
+            root = self.find(item)
+            if root not in dense:
+                dense[root] = len(dense)
+            labels.append(dense[root])
+        return labels
+
+class BKTree:
+    """Burkhard-Keller tree over integer hashes for Hamming-radius lookups."""
+
+    def __init__(self):
+        self.root = None
+
+    def add(self, value, item):
+        """Insert a hash value tagged with an item id."""
+        if self.root is None:
+            self.root = [value, [item], {}]
+            return
+        node = self.root
+        while True:
+            distance = hamming_distance(value, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [item], {}]
+                return
+            node = child
+
+    def query(self, value, max_distance):
+        """Return the item ids of every stored hash within max_distance bits."""
+        if self.root is None:
+            return []
+        matches = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            distance = hamming_distance(value, node[0])
+            if distance <= max_distance:
+                matches.extend(node[1])
+            # Triangle inequality: only children in this band can hold matches
+            for child_distance, child in node[2].items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        return matches
@@ -0,0 +1,326 @@
+import mmap
+import os
+import re
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+import zstandard
+from utils.crawl import PAGE_RESULTS
+
+CARD_START = re.compile(r"""<div\b[^>]*\bdata-component-type=["']s-search-result["'][^>]*>""", re.I)
+ASIN_ATTRIBUTE = re.compile(r"""\bdata-asin=["']([A-Za-z0-9]+)["']""")
+DIV_TAG = re.compile(r"<(/?)div\b", re.I)
+
+COMPRESSION_LEVEL = 9
+DICTIONARY_SIZE = 112 * 1024  # Upper bound; small archives get about a tenth of their sample bytes
+TRAIN_AFTER_FRAMES = 256  # Result cards archived without a dictionary before the first one is trained
+TRAINING_SAMPLES = 4000
+MIN_DICTIONARY_BYTES = 4 * 1024  # Smaller trained dictionaries are degenerate (e.g. trained on captcha pages)
+RETRAIN_RATIO = 0.75  # Retrain once recent cards compress this much worse than the dictionary's first cards
+
+FRAME_CARD = "card"
+FRAME_MARKUP = "markup"
+
+def card_end(html, start):
+    """Position just after the </div> that closes the card opening at start, or None if it is unbalanced."""
+    depth = 0
+    for tag in DIV_TAG.finditer(html, start):
+        depth += -1 if tag.group(1) else 1
+        if depth == 0:
+            return html.find(">", tag.end()) + 1
+    return None
+
+def split_page(html):
+    """Split a page source into consecutive (kind, asin, start, end) segments: one per result card and
+    one for the markup between cards. Joining the segments gives back the page exactly."""
+    segments = []
+    position = 0
+    for match in CARD_START.finditer(html):
+        if match.start() < position:
+            continue  # Nested inside the previous card
+        end = card_end(html, match.start())
+        if not end:
+            continue
+        if match.start() > position:
+            segments.append((FRAME_MARKUP, None, position, match.start()))
+        asin = ASIN_ATTRIBUTE.search(match.group(0))
+        segments.append((FRAME_CARD, asin.group(1) if asin else None, match.start(), end))
+        position = end
+    if position < len(html) or not segments:
+        segments.append((FRAME_MARKUP, None, position, len(html)))
+    return segments
+
+class PageArchive:
+    """Append-only archive of fetched page sources: zstd frames in one data file plus a SQLite offset index.
+
+    Each page is written as consecutive frames (one per result card, one per stretch of markup between
+    cards), compressed with a dictionary trained on earlier pages. A page is read back by decompressing
+    its frames in order and a single card is one frame, both through a memory map of the data file, so
+    nothing else in the archive is touched. Writers append under the index's BEGIN IMMEDIATE lock, so
+    several scraper processes can share one archive; the index is the source of truth (bytes from a
+    write that never committed are simply unreferenced).
+    """
+
+    def __init__(self, directory="page_archive", run=None, level=COMPRESSION_LEVEL, train_after=TRAIN_AFTER_FRAMES):
+        os.makedirs(directory, exist_ok=True)
+        self.data_path = os.path.join(directory, "pages.zst")
+        self.index_path = os.path.join(directory, "index.sqlite")
+        self.run = run or f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        self.level = level
+        self.train_after = train_after
+        self.next_check = {}  # Dictionary id -> card count under it at which training is next considered
+        self.dictionaries = {}
+        self.compressors = {}
+        self.decompressors = {}
+        self.mapped = None
+        with self.connection() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS fetches (
+                    id INTEGER PRIMARY KEY,
+                    run TEXT NOT NULL,
+                    keyword TEXT NOT NULL,
+                    page INTEGER NOT NULL,
+                    state TEXT,
+                    url TEXT,
+                    fetched_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS fetches_page ON fetches (run, keyword, page);
+                CREATE TABLE IF NOT EXISTS frames (
+                    id INTEGER PRIMARY KEY,
+                    fetch_id INTEGER NOT NULL REFERENCES fetches (id),
+                    seq INTEGER NOT NULL,
+                    kind TEXT NOT NULL,
+                    asin TEXT,
+                    offset INTEGER NOT NULL,
+                    length INTEGER NOT NULL,
+                    raw_length INTEGER NOT NULL,
+                    dictionary INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS frames_fetch ON frames (fetch_id, seq);
+                CREATE INDEX IF NOT EXISTS frames_asin ON frames (asin);
+                CREATE INDEX IF NOT EXISTS frames_dictionary ON frames (dictionary, kind);
+                CREATE TABLE IF NOT EXISTS dictionaries (
+                    id INTEGER PRIMARY KEY,
+                    data BLOB NOT NULL,
+                    samples INTEGER NOT NULL,
+                    trained_at REAL NOT NULL
+                );
+            """)
+
+    @contextmanager
+    def connection(self):
+        """Autocommit connection, closed on exit."""
+        conn = sqlite3.connect(self.index_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def dictionary(self, dictionary_id):
+        """The trained dictionary with this id (0 means frames compressed without one)."""
+        if dictionary_id not in self.dictionaries:
+            with self.connection() as conn:
+                row = conn.execute("SELECT data FROM dictionaries WHERE id = ?", (dictionary_id,)).fetchone()
+            self.dictionaries[dictionary_id] = zstandard.ZstdCompressionDict(row['data'])
+        return self.dictionaries[dictionary_id]
+
+    def compressor(self, dictionary_id):
+        if dictionary_id not in self.compressors:
+            dict_data = self.dictionary(dictionary_id) if dictionary_id else None
+            # The index records each frame's dictionary, so the frames do not repeat its id
+            self.compressors[dictionary_id] = zstandard.ZstdCompressor(level=self.level, dict_data=dict_data,
+                                                                       write_dict_id=False)
+        return self.compressors[dictionary_id]
+
+    def decompressor(self, dictionary_id):
+        if dictionary_id not in self.decompressors:
+            dict_data = self.dictionary(dictionary_id) if dictionary_id else None
+            self.decompressors[dictionary_id] = zstandard.ZstdDecompressor(dict_data=dict_data)
+        return self.decompressors[dictionary_id]
+
+    def latest_dictionary_id(self):
+        with self.connection() as conn:
+            return conn.execute("SELECT COALESCE(MAX(id), 0) FROM dictionaries").fetchone()[0]
+
+    def add_page(self, keyword, page, html, state=None, url=None):
+        """Append one fetched page source. Returns its fetch id."""
+        html = html or ""
+        dictionary_id = self.latest_dictionary_id()
+        compressor = self.compressor(dictionary_id)
+        frames = []
+        for kind, asin, start, end in split_page(html):
+            raw = html[start:end].encode("utf-8")
+            frames.append((kind, asin, compressor.compress(raw), len(raw)))
+
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                with open(self.data_path, "ab") as f:
+                    offset = f.seek(0, os.SEEK_END)
+                    f.write(b"".join(frame for _, _, frame, _ in frames))
+                fetch_id = conn.execute(
+                    "INSERT INTO fetches (run, keyword, page, state, url, fetched_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (self.run, keyword, page, state, url, time.time())).lastrowid
+                rows = []
+                for seq, (kind, asin, frame, raw_length) in enumerate(frames):
+                    rows.append((fetch_id, seq, kind, asin, offset, len(frame), raw_length, dictionary_id))
+                    offset += len(frame)
+                conn.executemany(
+                    "INSERT INTO frames (fetch_id, seq, kind, asin, offset, length, raw_length, dictionary) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+        if state == PAGE_RESULTS and any(kind == FRAME_CARD for kind, _, _, _ in frames):
+            self.check_dictionary(dictionary_id)
+        return fetch_id
+
+    def card_ratio(self, dictionary_id, newest, limit):
+        """Compression ratio of the oldest (or newest) result cards compressed with a dictionary."""
+        with self.connection() as conn:
+            row = conn.execute(
+                "SELECT SUM(raw_length), SUM(length) FROM (SELECT raw_length, length FROM frames "
+                f"WHERE dictionary = ? AND kind = ? ORDER BY id {'DESC' if newest else 'ASC'} LIMIT ?)",
+                (dictionary_id, FRAME_CARD, limit)).fetchone()
+        return row[0] / row[1] if row[1] else None
+
+    def check_dictionary(self, dictionary_id):
+        """Train a dictionary once enough result cards have been archived without one, and train a new one
+        when the current one is degenerate or its compression ratio on recent cards has dropped."""
+        with self.connection() as conn:
+            cards = conn.execute("SELECT COUNT(*) FROM frames WHERE dictionary = ? AND kind = ?",
+                                 (dictionary_id, FRAME_CARD)).fetchone()[0]
+        if cards < self.next_check.get(dictionary_id, self.train_after):
+            return
+        # Checked at most once per train_after cards; a failed training waits for that many more cards
+        self.next_check[dictionary_id] = cards + self.train_after
+        if dictionary_id == 0:
+            reason = "no dictionary yet"
+        elif len(self.dictionary(dictionary_id).as_bytes()) < MIN_DICTIONARY_BYTES:
+            reason = f"dictionary {dictionary_id} is degenerate"
+        else:
+            first = self.card_ratio(dictionary_id, newest=False, limit=self.train_after)
+            recent = self.card_ratio(dictionary_id, newest=True, limit=self.train_after)
+            if cards < 2 * self.train_after or recent >= first * RETRAIN_RATIO:
+                return
+            reason = f"card compression ratio fell from {first:.1f} to {recent:.1f}"
+        print(f"Training a page archive dictionary: {reason}")
+        self.train_dictionary(replaces=dictionary_id)
+
+    def train_dictionary(self, samples=TRAINING_SAMPLES, size=DICTIONARY_SIZE, replaces=None):
+        """Train a dictionary on the most recent result cards (cards from results pages, so blocked or
+        empty pages never make up the samples); new frames use it. Returns its id, or None if zstd could
+        not build a useful one (e.g. too little data). With replaces, nothing is stored unless that is
+        still the latest dictionary id, so concurrent writers do not each train their own."""
+        with self.connection() as conn:
+            rows = conn.execute(
+                "SELECT frames.offset, frames.length, frames.dictionary FROM frames "
+                "JOIN fetches ON fetches.id = frames.fetch_id WHERE frames.kind = ? AND fetches.state = ? "
+                "ORDER BY frames.id DESC LIMIT ?", (FRAME_CARD, PAGE_RESULTS, samples)).fetchall()
+        sample_data = [self.read_frame(row) for row in rows]
+        # A dictionary much larger than a tenth of its samples compresses worse, not better
+        size = min(size, sum(len(sample) for sample in sample_data) // 10)
+        try:
+            trained = zstandard.train_dictionary(size, sample_data, level=self.level)
+        except zstandard.ZstdError as e:
+            print(f"Could not train a page archive dictionary from {len(sample_data)} cards: {e}")
+            return None
+        if len(trained.as_bytes()) < MIN_DICTIONARY_BYTES:
+            print(f"Discarded a degenerate {len(trained.as_bytes())}-byte dictionary trained on "
+                  f"{len(sample_data)} cards.")
+            return None
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            latest = conn.execute("SELECT COALESCE(MAX(id), 0) FROM dictionaries").fetchone()[0]
+            if replaces is not None and latest != replaces:
+                conn.execute("ROLLBACK")
+                return None
+            dictionary_id = conn.execute(
+                "INSERT INTO dictionaries (data, samples, trained_at) VALUES (?, ?, ?)",
+                (trained.as_bytes(), len(sample_data), time.time())).lastrowid
+            conn.execute("COMMIT")
+        print(f"Trained page archive dictionary {dictionary_id} ({len(trained.as_bytes()) // 1024} KB) "
+              f"from {len(sample_data)} cards.")
+        return dictionary_id
+
+    def view(self, offset, length):
+        """Bytes of one frame, sliced from the memory-mapped data file (remapped once the file has grown)."""
+        if self.mapped is None or offset + length > len(self.mapped):
+            self.close()
+            with open(self.data_path, "rb") as f:
+                self.mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self.mapped[offset:offset + length]
+
+    def read_frame(self, row):
+        return self.decompressor(row['dictionary']).decompress(self.view(row['offset'], row['length']))
+
+    def find_fetch(self, keyword, page, run=None):
+        """The latest fetch of a keyword/page (in one run, or in any run)."""
+        query = "SELECT * FROM fetches WHERE keyword = ? AND page = ?"
+        params = [keyword, page]
+        if run:
+            query += " AND run = ?"
+            params.append(run)
+        with self.connection() as conn:
+            row = conn.execute(query + " ORDER BY id DESC LIMIT 1", params).fetchone()
+        return dict(row) if row else None
+
+    def read_fetch(self, fetch_id):
+        """Page source of one fetch, rebuilt from its frames."""
+        with self.connection() as conn:
+            rows = conn.execute("SELECT offset, length, dictionary FROM frames WHERE fetch_id = ? ORDER BY seq",
+                                (fetch_id,)).fetchall()
+        if not rows:
+            return None
+        return b"".join(self.read_frame(row) for row in rows).decode("utf-8")
+
+    def read_page(self, keyword, page, run=None):
+        """Page source of the latest fetch of a keyword/page, or None if it was never archived."""
+        fetch = self.find_fetch(keyword, page, run)
+        return self.read_fetch(fetch['id']) if fetch else None
+
+    def read_card(self, asin, run=None, keyword=None, page=None):
+        """HTML of the latest archived result card for an ASIN (optionally within a run/keyword/page), or None."""
+        query = ("SELECT frames.offset, frames.length, frames.dictionary FROM frames "
+                 "JOIN fetches ON fetches.id = frames.fetch_id WHERE frames.asin = ? AND frames.kind = ?")
+        params = [asin, FRAME_CARD]
+        for column, value in (('run', run), ('keyword', keyword), ('page', page)):
+            if value is not None:
+                query += f" AND fetches.{column} = ?"
+                params.append(value)
+        with self.connection() as conn:
+            row = conn.execute(query + " ORDER BY frames.id DESC LIMIT 1", params).fetchone()
+        return self.read_frame(row).decode("utf-8") if row else None
+
+    def fetches(self, run=None, state=None):
+        """Archived fetches (latest last), optionally for one run and/or page state."""
+        query = "SELECT * FROM fetches WHERE 1 = 1"
+        params = []
+        for column, value in (('run', run), ('state', state)):
+            if value is not None:
+                query += f" AND {column} = ?"
+                params.append(value)
+        with self.connection() as conn:
+            return [dict(row) for row in conn.execute(query + " ORDER BY id", params)]
+
+    def stats(self):
+        """Totals per run plus raw vs stored size."""
+        with self.connection() as conn:
+            runs = [dict(row) for row in conn.execute(
+                "SELECT run, COUNT(*) AS fetches, MIN(fetched_at) AS started FROM fetches GROUP BY run ORDER BY started")]
+            totals = dict(conn.execute(
+                "SELECT COUNT(*) AS frames, SUM(kind = ?) AS cards, COALESCE(SUM(raw_length), 0) AS raw_bytes, "
+                "COALESCE(SUM(length), 0) AS stored_bytes FROM frames", (FRAME_CARD,)).fetchone())
+            totals['dictionaries'] = conn.execute("SELECT COUNT(*) FROM dictionaries").fetchone()[0]
+        totals['ratio'] = round(totals['raw_bytes'] / totals['stored_bytes'], 1) if totals['stored_bytes'] else None
+        totals['runs'] = runs
+        return totals
+
+    def close(self):
+        if self.mapped is not None:
+            self.mapped.close()
+            self.mapped = None
@@ -0,0 +1,102 @@
+from array import array
+import math
+import re
+import numpy as np
+import pandas as pd
+
+NUMBER_PATTERN = re.compile(r'\d+(?:\.\d+)?')
+
+def parse_price(text):
+    """Parse a price string such as '1,299.' into a float, or None."""
+    if not text:
+        return None
+    match = NUMBER_PATTERN.search(text.replace(',', ''))
+    return float(match.group()) if match else None
+
+def parse_rating(text):
+    """Parse a rating string such as '4.2 out of 5 stars' into a float, or None."""
+    if not text:
+        return None
+    match = NUMBER_PATTERN.search(text)
+    return float(match.group()) if match else None
+
+def parse_count(text):
+    """Parse a count string such as '(1,234)' into an int, or None."""
+    if not text:
+        return None
+    digits = re.sub(r'[^\d]', '', text)
+    return int(digits) if digits else None
+
+class ProductRecord:
+    """One extracted product with numeric fields already parsed; missing values are None."""
+
+    __slots__ = ('title', 'brand', 'rating', 'reviews', 'price', 'image_url', 'product_url', 'is_sponsored', 'keyword')
+
+    def __init__(self, title=None, brand=None, rating=None, reviews=None, price=None,
+                 image_url=None, product_url=None, is_sponsored=False, keyword=None):
+        self.title = title
+        self.brand = brand
+        self.rating = rating
+        self.reviews = reviews
+        self.price = price
+        self.image_url = image_url
+        self.product_url = product_url
+        self.is_sponsored = is_sponsored
+        self.keyword = keyword
+
+class ProductBatch:
+    """Columnar accumulator for ProductRecords: strings in lists, numbers in typed arrays.
+
+    Missing floats are stored as NaN and missing review counts are tracked in a mask,
+    so the batch converts to a DataFrame without building a dict per row.
+    """
+
+    def __init__(self):
+        self.titles = []
+        self.brands = []
+        self.image_urls = []
+        self.product_urls = []
+        self.keywords = []
+        self.sponsored = array('b')
+        self.ratings = array('d')
+        self.prices = array('d')
+        self.reviews = array('q')
+        self.reviews_missing = array('b')
+
+    def __len__(self):
+        return len(self.titles)
+
+    def append(self, record):
+        """Add one record's fields to the columns."""
+        self.titles.append(record.title)
+        self.brands.append(record.brand)
+        self.image_urls.append(record.image_url)
+        self.product_urls.append(record.product_url)
+        self.keywords.append(record.keyword)
+        self.sponsored.append(1 if record.is_sponsored else 0)
+        self.ratings.append(math.nan if record.rating is None else record.rating)
+        self.prices.append(math.nan if record.price is None else record.price)
+        self.reviews.append(0 if record.reviews is None else record.reviews)
+        self.reviews_missing.append(1 if record.reviews is None else 0)
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def to_dataframe(self):
+        """Build a DataFrame straight from the columns (float64 Rating/Price, nullable Int64 Reviews)."""
+        reviews = pd.arrays.IntegerArray(
+            np.frombuffer(self.reviews, dtype=np.int64).copy(),
+            np.frombuffer(self.reviews_missing, dtype=np.int8).astype(bool),
+        )
+        return pd.DataFrame({
+            'Title': self.titles,
+            'Brand': self.brands,
+            'Rating': np.frombuffer(self.ratings, dtype=np.float64).copy(),
+            'Reviews': reviews,
+            'Price': np.frombuffer(self.prices, dtype=np.float64).copy(),
+            'Image URL': self.image_urls,
+            'Product URL': self.product_urls,
+            'Is Sponsored': np.where(np.frombuffer(self.sponsored, dtype=np.int8) == 1, 'Yes', 'No'),
+            'Keyword': self.keywords,
+        })
@@ -0,0 +1,86 @@
+SPONSORED_WORD = "sponsored"
+SPONSORED_COMPONENT_TYPE = "s-sponsored-result"
+SPONSORED_LABEL_SELECTOR = "div.s-sponsored-label-info-icon, span.sponsored-label-text, span.puis-sponsored-label"
+LABEL_TAGS = ('span', 'div')
+
+def is_sponsored_legacy(product):
+    """Original full-subtree detection, kept as the reference the fast classifier is checked against."""
+    try:
+        # Check for explicit 'Sponsored' badge via text
+        badge = product.select_one("span.a-color-secondary, span.a-text-bold")
+        if badge and badge.text.strip().lower() == "sponsored":
+            return True
+
+        # Look for 'Sponsored' inside nested spans/divs
+        for tag in product.find_all(['span', 'div']):
+            if tag.text.strip().lower() == "sponsored":
+                return True
+
+        # Sponsored label via ARIA label or data attribute (used in mobile view and newer Amazon layouts)
+        if 'data-component-type' in product.attrs and product['data-component-type'] == 's-sponsored-result':
+            return True
+
+        # Search inside specific divs used for sponsored labeling
+        possible_labels = product.select("div.s-sponsored-label-info-icon, span.sponsored-label-text, span.puis-sponsored-label")
+        for label in possible_labels:
+            if "sponsored" in label.text.strip().lower():
+                return True
+    except Exception:
+        pass
+    return False
+
+def has_sponsored_label_tag(text_node, product):
+    """Walk up from a text node containing 'sponsored' looking for a span/div whose whole text is 'Sponsored'."""
+    tag = text_node.parent
+    while tag is not None and tag is not product:
+        text = tag.get_text().strip()
+        if len(text) > len(SPONSORED_WORD):
+            return False  # Ancestors only hold more text, so none of them can match
+        if tag.name in LABEL_TAGS and text.lower() == SPONSORED_WORD:
+            return True
+        tag = tag.parent
+    return False
+
+def is_sponsored(product):
+    """Detect sponsored product cards, returning the same answer as is_sponsored_legacy.
+
+    Checks run cheapest first: the card's data-component-type attribute, then a
+    single pass over the card's text. Every other signal needs the word
+    'sponsored' somewhere in that text, so the non-sponsored majority stop there;
+    the full legacy scan only runs when the word is split across tags.
+    """
+    try:
+        if product.get('data-component-type') == SPONSORED_COMPONENT_TYPE:
+            return True
+
+        # One pass over the card's text. Any tag's text is a contiguous slice of it,
+        # so no 'sponsored' here means no badge or label element can match either
+        pieces = []
+        candidates = []
+        for text in product.strings:
+            lowered = text.lower()
+            pieces.append(lowered)
+            if SPONSORED_WORD in lowered:
+                candidates.append(text)
+        card_text = ''.join(pieces)
+        if SPONSORED_WORD not in card_text:
+            return False
+
+        # Badge spans/divs: only climb from the text nodes that mention the word
+        for text_node in candidates:
+            if has_sponsored_label_tag(text_node, product):
+                return True
+
+        # Dedicated label elements (Amazon's own sponsored label classes)
+        for label in product.select(SPONSORED_LABEL_SELECTOR):
+            if SPONSORED_WORD in label.get_text().lower():
+                return True
+
+        # The word can also be split across text nodes ("Spon<b>sored</b>"); only then
+        # fall back to the full scan
+        whole_word_hits = sum(piece.count(SPONSORED_WORD) for piece in pieces)
+        if card_text.count(SPONSORED_WORD) > whole_word_hits:
+            return is_sponsored_legacy(product)
+    except Exception:
+        pass
+    return False
@@ -1,7 +1,13 @@
 import matplotlib.pyplot as plt
+from matplotlib.colors import LogNorm
+import numpy as np
 import seaborn as sns
 import os
 
+# Above this many rows plot_scatter draws a 2D histogram instead of one marker per row
+SCATTER_MAX_POINTS = 5000
+SCATTER_BINS = 60
+
 def setup_plot_style():
     """Set up consistent plot styling."""
     sns.set_style("whitegrid")
@@ -38,11 +44,25 @@ def plot_pie(data, labels, title, filename, output_dir="output"):
     plt.title(title)
     save_plot(filename, output_dir)
 
-def plot_scatter(data, x, y, title, xlabel, ylabel, filename, output_dir="output"):
-    """Create and save a scatter plot."""
+def plot_density(x_values, y_values, bins=SCATTER_BINS):
+    """Draw a 2D histogram of two numeric arrays (cost depends on the bin count, not the row count)."""
+    x_values = np.asarray(x_values, dtype=float)
+    y_values = np.asarray(y_values, dtype=float)
+    finite = np.isfinite(x_values) & np.isfinite(y_values)
+    counts, x_edges, y_edges = np.histogram2d(x_values[finite], y_values[finite], bins=bins)
+    counts = np.ma.masked_equal(counts, 0)  # Leave empty bins blank
+    mesh = plt.pcolormesh(x_edges, y_edges, counts.T, cmap="viridis", norm=LogNorm())
+    plt.colorbar(mesh, label="Products")
+
+def plot_scatter(data, x, y, title, xlabel, ylabel, filename, output_dir="output", max_points=SCATTER_MAX_POINTS):
+    """Create and save a scatter plot, switching to a binned density plot above max_points rows."""
     setup_plot_style()
     plt.figure()
-    sns.scatterplot(data=data, x=x, y=y, hue=y, size=y, palette="viridis")
+    if len(data) > max_points:
+        print(f"{len(data)} points exceeds {max_points}, drawing a binned density plot instead of a scatter plot.")
+        plot_density(data[x], data[y])
+    else:
+        sns.scatterplot(data=data, x=x, y=y, hue=y, size=y, palette="viridis")
     plt.title(title)
     plt.xlabel(xlabel)
     plt.ylabel(ylabel)
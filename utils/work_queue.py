@@ -0,0 +1,159 @@
+import sqlite3
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+
+class WorkQueue(ABC):
+    """Shared queue of (keyword, page) crawl tasks handed out under time-limited leases.
+
+    A worker leases a task, heartbeats while it works, and completes it. If the
+    worker dies, its lease expires and the task is delivered to another worker.
+    Backends (SQLite file today, a networked broker later) implement these methods.
+    """
+
+    @abstractmethod
+    def enqueue(self, keyword, page=1, priority=None):
+        """Add a task unless it already exists. Returns True if it was added."""
+
+    @abstractmethod
+    def lease(self, worker_id, lease_seconds=300):
+        """Take the next ready task (or one whose lease expired). Returns a task dict or None."""
+
+    @abstractmethod
+    def heartbeat(self, task, lease_seconds=300):
+        """Extend a lease. Returns False if the lease was lost to another worker."""
+
+    @abstractmethod
+    def complete(self, task):
+        """Mark a leased task done. Returns False if the lease was lost to another worker."""
+
+    @abstractmethod
+    def fail(self, task, reason, retry_delay=0):
+        """Give a leased task back to be retried after retry_delay seconds (or fail it for good)."""
+
+    @abstractmethod
+    def stats(self):
+        """Return task counts by status."""
+
+    @abstractmethod
+    def completed_leases(self):
+        """Return the lease id that completed each done task, keyed by (keyword, page)."""
+
+    @abstractmethod
+    def failed_tasks(self):
+        """Return the tasks that ran out of attempts."""
+
+class SQLiteWorkQueue(WorkQueue):
+    """WorkQueue stored in one SQLite file, shareable by processes on one host or on shared storage.
+
+    Every call opens its own connection and leases are taken inside BEGIN IMMEDIATE,
+    so two workers never receive the same task at once. SQLite locking over network
+    filesystems depends on the filesystem honouring POSIX locks.
+    """
+
+    def __init__(self, path="crawl_queue.sqlite", max_attempts=4):
+        self.path = path
+        self.max_attempts = max_attempts
+        with self.connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS tasks (
+                    id INTEGER PRIMARY KEY,
+                    keyword TEXT NOT NULL,
+                    page INTEGER NOT NULL,
+                    priority INTEGER NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    ready_at REAL NOT NULL DEFAULT 0,
+                    lease_id TEXT,
+                    lease_owner TEXT,
+                    lease_expires REAL,
+                    last_error TEXT,
+                    UNIQUE (keyword, page)
+                )""")
+
+    @contextmanager
+    def connection(self):
+        """Autocommit connection, closed on exit."""
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def enqueue(self, keyword, page=1, priority=None):
+        with self.connection() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO tasks (keyword, page, priority) VALUES (?, ?, ?)",
+                (keyword, page, page if priority is None else priority))
+            return cursor.rowcount == 1
+
+    def lease(self, worker_id, lease_seconds=300):
+        now = time.time()
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Expired leases that have used up their attempts are not redelivered again
+                conn.execute(
+                    "UPDATE tasks SET status = 'failed', last_error = 'lease expired' "
+                    "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                    (now, self.max_attempts))
+                row = conn.execute(
+                    "SELECT * FROM tasks WHERE (status = 'pending' AND ready_at <= ?) "
+                    "OR (status = 'leased' AND lease_expires < ?) ORDER BY priority, id LIMIT 1",
+                    (now, now)).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                lease_id = uuid.uuid4().hex
+                conn.execute(
+                    "UPDATE tasks SET status = 'leased', attempts = attempts + 1, lease_id = ?, "
+                    "lease_owner = ?, lease_expires = ? WHERE id = ?",
+                    (lease_id, worker_id, now + lease_seconds, row['id']))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return {'id': row['id'], 'keyword': row['keyword'], 'page': row['page'],
+                'attempts': row['attempts'] + 1, 'lease_id': lease_id, 'worker_id': worker_id}
+
+    def heartbeat(self, task, lease_seconds=300):
+        with self.connection() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET lease_expires = ? WHERE id = ? AND status = 'leased' AND lease_id = ?",
+                (time.time() + lease_seconds, task['id'], task['lease_id']))
+            return cursor.rowcount == 1
+
+    def complete(self, task):
+        with self.connection() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET status = 'done', lease_expires = NULL WHERE id = ? AND status = 'leased' AND lease_id = ?",
+                (task['id'], task['lease_id']))
+            return cursor.rowcount == 1
+
+    def fail(self, task, reason, retry_delay=0):
+        with self.connection() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "ready_at = ?, last_error = ?, lease_id = NULL, lease_owner = NULL, lease_expires = NULL "
+                "WHERE id = ? AND status = 'leased' AND lease_id = ?",
+                (self.max_attempts, time.time() + retry_delay, reason, task['id'], task['lease_id']))
+            return cursor.rowcount == 1
+
+    def stats(self):
+        with self.connection() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM tasks GROUP BY status").fetchall()
+        counts = {'pending': 0, 'leased': 0, 'done': 0, 'failed': 0}
+        counts.update({row['status']: row['n'] for row in rows})
+        return counts
+
+    def completed_leases(self):
+        with self.connection() as conn:
+            rows = conn.execute("SELECT keyword, page, lease_id FROM tasks WHERE status = 'done'").fetchall()
+        return {(row['keyword'], row['page']): row['lease_id'] for row in rows}
+
+    def failed_tasks(self):
+        with self.connection() as conn:
+            rows = conn.execute("SELECT keyword, page, attempts, last_error FROM tasks WHERE status = 'failed'").fetchall()
+        return [dict(row) for row in rows]
@@ -0,0 +1,62 @@
+import os
+import sys
+import timeit
+from bs4 import BeautifulSoup
+from utils.sponsored import is_sponsored, is_sponsored_legacy
+
+FIXTURE_DIR = os.path.join("fixtures", "sponsored_cards")
+
+def load_fixture_cards(fixture_dir=FIXTURE_DIR):
+    """Load the labeled card corpus. The file name prefix (sponsored_/organic_) is the expected label."""
+    cards = []
+    for name in sorted(os.listdir(fixture_dir)):
+        if not name.endswith(".html"):
+            continue
+        with open(os.path.join(fixture_dir, name), encoding="utf-8") as f:
+            soup = BeautifulSoup(f.read(), 'lxml')
+        card = soup.find('div', attrs={'data-component-type': True})
+        cards.append((name, card, name.startswith("sponsored_")))
+    return cards
+
+def load_page_cards(page_file):
+    """Load every product card from a saved search results page (labels unknown)."""
+    with open(page_file, encoding="utf-8") as f:
+        soup = BeautifulSoup(f.read(), 'lxml')
+    products = soup.find_all('div', {'data-component-type': ['s-search-result', 's-sponsored-result']})
+    return [(product.get('data-asin', f'card-{idx}'), product, None) for idx, product in enumerate(products, 1)]
+
+def time_per_card(classifier, cards, repeat=5, number=20):
+    """Best-of-repeat microseconds per card for a classifier over the corpus."""
+    best = min(timeit.repeat(lambda: [classifier(card) for _, card, _ in cards], repeat=repeat, number=number))
+    return best / (number * len(cards)) * 1e6
+
+def verify(cards):
+    """Check the fast classifier against the legacy one (and the expected labels). Returns the mismatch count."""
+    mismatches = 0
+    for name, card, expected in cards:
+        fast = is_sponsored(card)
+        legacy = is_sponsored_legacy(card)
+        ok = fast == legacy and (expected is None or legacy == expected)
+        mismatches += not ok
+        print(f"{'✓' if ok else '✗'} {name}: fast={fast} legacy={legacy}"
+              + ("" if expected is None else f" expected={expected}"))
+    return mismatches
+
+def main(page_file=None):
+    """Verify agreement on the fixture corpus (or a saved page) and compare speed per card."""
+    cards = load_page_cards(page_file) if page_file else load_fixture_cards()
+    print(f"Checking {len(cards)} product cards...\n")
+    mismatches = verify(cards)
+
+    legacy_us = time_per_card(is_sponsored_legacy, cards)
+    fast_us = time_per_card(is_sponsored, cards)
+    print(f"\nLegacy classifier: {legacy_us:.1f} µs/card")
+    print(f"Fast classifier:   {fast_us:.1f} µs/card ({legacy_us / fast_us:.1f}x faster)")
+
+    if mismatches:
+        print(f"\n✗ {mismatches} card(s) disagree.")
+        sys.exit(1)
+    print("\n✅ Fast classifier agrees with the legacy logic on every card.")
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else None)